@@ -1,21 +1,71 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+import csv
+import logging
+import io
+import json
+import click
+from datetime import date, datetime, timedelta
+from flask import Flask, Blueprint, current_app, render_template, request, redirect, url_for, session, flash, abort, g, send_from_directory, jsonify, get_template_attribute, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.record_queries import get_recorded_queries
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
+from markupsafe import Markup
+from cache import FragmentCache
+from checkin import CheckinService, ticket_serializer, make_ticket_token, read_ticket_token
+from uploads import IMAGE_ERRORS, VARIANTS, save_upload, generate_variants, variant_name
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///event_registration.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = 'your_secret_key_here'
-app.config['UPLOAD_FOLDER'] = 'static/uploads'
-db = SQLAlchemy(app)
+class Config:
+    """Konfigurasi default. Nilai bisa ditimpa lewat environment variable berawalan FLASK_
+    (misalnya FLASK_SECRET_KEY, FLASK_DB_POOL_SIZE=20) atau argumen create_app."""
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///event_registration.db'  # DATABASE_URL juga dibaca
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SECRET_KEY = 'your_secret_key_here'
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # Batas ukuran request (termasuk upload gambar)
+    MAX_IMAGE_PIXELS = 40 * 1000 * 1000  # Batas piksel gambar upload, diperiksa dari header sebelum decode
+    UPLOAD_CACHE_MAX_AGE = 365 * 24 * 3600  # Nama file berbasis hash isi, aman di-cache selamanya
+    # Cache fragmen HTML untuk beranda dan detail event (lihat cached_fragment)
+    FRAGMENT_CACHE_ENABLED = True
+    FRAGMENT_CACHE_SIZE = 1024
+    FRAGMENT_CACHE_TTL = 60
+    CHECKIN_MAX_BATCH = 500  # Jumlah token maksimum per request check-in
+    # State check-in per event di memori (lihat CheckinService): jumlah event maksimum dan umur dalam detik
+    CHECKIN_STATE_SIZE = 256
+    CHECKIN_STATE_TTL = 300
+    # Catat query SQL per request untuk instrumentasi (lihat record_query_stats). None berarti
+    # otomatis: aktif saat debug, testing atau SQL_DEBUG_HEADERS, karena pencatatan menelusuri
+    # stack pada setiap query
+    SQLALCHEMY_RECORD_QUERIES = None
+    SQL_DEBUG_HEADERS = False
+    SQL_SLOW_QUERY_COUNT = 3
+    # Connection pool per proses worker
+    DB_POOL_SIZE = 10
+    DB_MAX_OVERFLOW = 20
+    DB_POOL_TIMEOUT = 30
+    # PRAGMA yang di-set pada setiap koneksi SQLite baru. WAL membuat pembaca tidak memblokir
+    # penulis, synchronous=NORMAL aman dengan WAL dan jauh lebih cepat dari FULL.
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'busy_timeout': 5000,
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,  # Negatif berarti KiB, jadi sekitar 64 MB
+    }
 
-# Ensure upload folder exists
-if not os.path.exists(app.config['UPLOAD_FOLDER']):
-    os.makedirs(app.config['UPLOAD_FOLDER'])
+db = SQLAlchemy()
+bp = Blueprint('main', __name__, cli_group=None)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+EVENTS_PER_PAGE = 20
+PARTICIPANTS_PER_PAGE = 50
+EXPORT_BATCH_SIZE = 1000
+DASHBOARD_TOP_EVENTS = 10
+DASHBOARD_TREND_DAYS = 30
+IDEMPOTENCY_KEY_MAX_LENGTH = 64
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -27,6 +77,13 @@ class User(db.Model):
     is_admin = db.Column(db.Boolean, default=False)
 
 class Event(db.Model):
+    # Index untuk keyset pagination (ORDER BY tanggal, id) dan lookup event per pembuat
+    __table_args__ = (
+        db.Index('ix_event_tanggal_id', 'tanggal', 'id'),
+        db.Index('ix_event_user_id', 'user_id'),
+        db.Index('ix_event_sold', db.text('(registered_count + attended_count) DESC')),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     nama_event = db.Column(db.String(100), nullable=False)
     deskripsi = db.Column(db.Text, nullable=False)
@@ -36,31 +93,471 @@ class Event(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     harga = db.Column(db.Float, nullable=False, default=0.0)
     stok = db.Column(db.Integer, nullable=False, default=0)
+    # Penghitung pendaftaran per status, diperbarui dalam transaksi yang sama dengan perubahan registration.
+    # Periksa/bangun ulang dengan `flask rebuild-counters`.
+    registered_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    attended_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    cancelled_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    revenue = db.Column(db.Float, nullable=False, default=0.0, server_default='0')  # jumlah Registration.harga
 
     user = db.relationship('User', backref=db.backref('events', lazy=True))
 
     def __repr__(self):
         return f'<Event {self.nama_event}>'
 
+# Index full-text (FTS5) untuk pencarian event, disinkronkan dengan tabel event lewat trigger.
+# Dipakai create_all; database yang dimigrasi memakai salinan beku di migrations.py.
+EVENT_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS event_fts USING fts5("
+    "nama_event, deskripsi, lokasi, content='event', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_ai AFTER INSERT ON event BEGIN "
+    "INSERT INTO event_fts(rowid, nama_event, deskripsi, lokasi) "
+    "VALUES (new.id, new.nama_event, new.deskripsi, new.lokasi); END",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_ad AFTER DELETE ON event BEGIN "
+    "INSERT INTO event_fts(event_fts, rowid, nama_event, deskripsi, lokasi) "
+    "VALUES ('delete', old.id, old.nama_event, old.deskripsi, old.lokasi); END",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_au AFTER UPDATE OF nama_event, deskripsi, lokasi ON event BEGIN "
+    "INSERT INTO event_fts(event_fts, rowid, nama_event, deskripsi, lokasi) "
+    "VALUES ('delete', old.id, old.nama_event, old.deskripsi, old.lokasi); "
+    "INSERT INTO event_fts(rowid, nama_event, deskripsi, lokasi) "
+    "VALUES (new.id, new.nama_event, new.deskripsi, new.lokasi); END",
+]
+
+for _ddl in EVENT_FTS_DDL:
+    db.event.listen(Event.__table__, 'after_create', db.DDL(_ddl).execute_if(dialect='sqlite'))
+
 class Registration(db.Model):
+    # Satu user hanya boleh terdaftar sekali per event, dijaga oleh database.
+    # Index ini juga melayani lookup per user; ix_registration_event_id melayani daftar peserta per event.
+    __table_args__ = (
+        db.Index('uq_registration_user_event', 'user_id', 'event_id', unique=True),
+        db.Index('ix_registration_event_id', 'event_id', 'id'),
+        # Idempotency key unik per user, sehingga key dari klien lain tidak pernah menolak pendaftaran
+        db.Index('uq_registration_user_idempotency_key', 'user_id', 'idempotency_key', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
     status = db.Column(db.String(20), default='registered')  # registered, attended, cancelled
+    idempotency_key = db.Column(db.String(IDEMPOTENCY_KEY_MAX_LENGTH), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=True, default=datetime.now)
+    harga = db.Column(db.Float, nullable=False, default=0.0, server_default='0')  # harga tiket saat dipesan
 
     user = db.relationship('User', backref=db.backref('registrations', lazy=True))
     event = db.relationship('Event', backref=db.backref('registrations', lazy=True))
 
+class RegistrationDaily(db.Model):
+    # Rekap pendaftaran per hari per event untuk dashboard admin; pendapatan adalah jumlah Registration.harga.
+    # event_id ikut kunci agar pemesanan event berbeda tidak berebut satu baris rekap yang sama.
+    day = db.Column(db.Date, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), primary_key=True)
+    registrations = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+def _daily_rollup_upsert(event_id, harga):
+    """INSERT ... ON CONFLICT yang menambah rekap hari ini untuk event sebanyak satu pendaftaran seharga `harga`"""
+    dialect = db.session.get_bind().dialect.name
+    insert = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+    stmt = insert(RegistrationDaily).values(day=date.today(), event_id=event_id, registrations=1, revenue=harga)
+    return stmt.on_conflict_do_update(
+        index_elements=[RegistrationDaily.day, RegistrationDaily.event_id],
+        set_={
+            'registrations': RegistrationDaily.registrations + 1,
+            'revenue': RegistrationDaily.revenue + stmt.excluded.revenue,
+        },
+    )
+
+def _daily_recount():
+    """Subquery (day, event_id, registrations, revenue) yang dihitung ulang dari tabel registration"""
+    registration = Registration.__table__
+    day = db.func.date(registration.c.created_at)
+    return (
+        db.select(day.label('day'), registration.c.event_id, db.func.count().label('registrations'),
+                  db.func.coalesce(db.func.sum(registration.c.harga), 0.0).label('revenue'))
+        .where(registration.c.created_at.is_not(None))
+        .group_by(day, registration.c.event_id)
+    )
+
+# Hasil reserve_ticket
+RESERVE_OK = 'ok'
+RESERVE_DUPLICATE = 'duplicate'
+RESERVE_SOLD_OUT = 'sold_out'
+RESERVE_NOT_FOUND = 'not_found'
+RESERVE_KEY_CONFLICT = 'key_conflict'
+
+def _existing_reservation(user_id, event_id, idempotency_key):
+    """Bedakan retry dengan idempotency key yang sama dari pendaftaran ganda.
+
+    Retry dicari lewat pasangan (user_id, idempotency_key); key yang sudah dipakai user
+    yang sama untuk event lain dilaporkan sebagai RESERVE_KEY_CONFLICT.
+    """
+    if idempotency_key:
+        keyed_event_id = db.session.query(Registration.event_id).filter_by(
+            user_id=user_id, idempotency_key=idempotency_key).scalar()
+        if keyed_event_id is not None:
+            return RESERVE_OK if keyed_event_id == event_id else RESERVE_KEY_CONFLICT
+    if db.session.query(Registration.id).filter_by(user_id=user_id, event_id=event_id).first():
+        return RESERVE_DUPLICATE
+    return None
+
+def reserve_ticket(user_id, event_id, idempotency_key=None):
+    """Pesan satu tiket: kurangi stok secara kondisional lalu simpan pendaftaran dalam satu transaksi pendek.
+
+    Tidak ada SELECT sebelum UPDATE, sehingga transaksi langsung memegang write lock
+    dan tidak perlu upgrade lock (penyebab SQLITE_BUSY saat banyak request bersamaan).
+    idempotency_key lebih dari IDEMPOTENCY_KEY_MAX_LENGTH karakter ditolak dengan ValueError.
+    """
+    if idempotency_key is not None and len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise ValueError(f'idempotency_key maksimal {IDEMPOTENCY_KEY_MAX_LENGTH} karakter')
+    decrement = (
+        db.update(Event)
+        .where(Event.id == event_id, Event.stok > 0)
+        .values(stok=Event.stok - 1, registered_count=Event.registered_count + 1, revenue=Event.revenue + Event.harga)
+        .returning(Event.harga)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        # RETURNING memberi harga yang berlaku saat baris event terkunci, disimpan sebagai harga tiket
+        harga = db.session.execute(decrement).scalar()
+        if harga is None:
+            db.session.rollback()
+            existing = _existing_reservation(user_id, event_id, idempotency_key)
+            if existing:
+                return existing
+            return RESERVE_SOLD_OUT if db.session.get(Event, event_id) else RESERVE_NOT_FOUND
+        db.session.add(Registration(user_id=user_id, event_id=event_id, idempotency_key=idempotency_key, harga=harga))
+        db.session.execute(_daily_rollup_upsert(event_id, harga))
+        db.session.commit()
+    except IntegrityError:
+        # Rollback juga mengembalikan stok yang sudah dikurangi
+        db.session.rollback()
+        return _existing_reservation(user_id, event_id, idempotency_key) or RESERVE_DUPLICATE
+    return RESERVE_OK
+
+def _counted_registrations(status):
+    registration = Registration.__table__
+    event = Event.__table__
+    return (
+        db.select(db.func.count())
+        .where(registration.c.event_id == event.c.id, registration.c.status == status)
+        .scalar_subquery()
+    )
+
+def _recounted_columns():
+    registration = Registration.__table__
+    event = Event.__table__
+    return {
+        'registered_count': _counted_registrations('registered'),
+        'attended_count': _counted_registrations('attended'),
+        'cancelled_count': _counted_registrations('cancelled'),
+        'revenue': (
+            db.select(db.func.coalesce(db.func.sum(registration.c.harga), 0.0))
+            .where(registration.c.event_id == event.c.id)
+            .scalar_subquery()
+        ),
+    }
+
+def _revenue_differs(stored, recounted):
+    # Pendapatan berupa float; selisih pembulatan karena urutan penjumlahan diabaikan
+    return db.func.abs(stored - recounted) > 0.005
+
+def count_counter_mismatches(conn):
+    """(jumlah event, jumlah baris rekap harian) yang tidak sama dengan hasil hitung ulang dari registration"""
+    event = Event.__table__
+    daily = RegistrationDaily.__table__
+    recounted = _recounted_columns()
+    stale = db.or_(
+        _revenue_differs(event.c.revenue, recounted.pop('revenue')),
+        *(event.c[name] != value for name, value in recounted.items()),
+    )
+    events = conn.execute(db.select(db.func.count()).select_from(event).where(stale)).scalar()
+    recount = _daily_recount().subquery()
+    same_key = db.and_(recount.c.day == daily.c.day, recount.c.event_id == daily.c.event_id)
+    stale_days = conn.execute(
+        db.select(db.func.count()).select_from(daily.outerjoin(recount, same_key))
+        .where(db.or_(recount.c.day.is_(None), daily.c.registrations != recount.c.registrations,
+                      _revenue_differs(daily.c.revenue, recount.c.revenue)))
+    ).scalar()
+    missing_days = conn.execute(
+        db.select(db.func.count()).select_from(recount.outerjoin(daily, same_key))
+        .where(daily.c.day.is_(None))
+    ).scalar()
+    return events, stale_days + missing_days
+
+def rebuild_counters(conn):
+    """Hitung ulang penghitung event dan rekap harian dengan UPDATE/INSERT ... SELECT berbasis set"""
+    event = Event.__table__
+    daily = RegistrationDaily.__table__
+    conn.execute(event.update().values(_recounted_columns()))
+    conn.execute(daily.delete())
+    conn.execute(daily.insert().from_select(['day', 'event_id', 'registrations', 'revenue'], _daily_recount()))
+
+def encode_cursor(event):
+    return f"{event.tanggal.isoformat()}_{event.id}"
+
+def decode_cursor(cursor):
+    try:
+        tanggal, event_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(tanggal), int(event_id)
+    except ValueError:
+        abort(400)
+
+def fts_query(text):
+    """Ubah input pencarian menjadi query FTS5 yang aman: setiap kata di-quote dan dicocokkan sebagai prefix"""
+    return ' '.join('"{}"*'.format(word.replace('"', '""')) for word in text.split())
+
+def filter_events(query, args):
+    """Terapkan filter pencarian (q), waktu (upcoming/past) dan rentang harga dari query string"""
+    q = args.get('q', '').strip()
+    if q:
+        if db.engine.dialect.name == 'sqlite':
+            matches = (
+                db.select(db.literal_column('rowid'))
+                .select_from(db.table('event_fts'))
+                .where(db.literal_column('event_fts').op('MATCH')(fts_query(q)))
+            )
+            query = query.filter(Event.id.in_(matches))
+        else:
+            pattern = f'%{q}%'
+            query = query.filter(db.or_(Event.nama_event.ilike(pattern), Event.deskripsi.ilike(pattern), Event.lokasi.ilike(pattern)))
+    waktu = args.get('waktu')
+    if waktu == 'upcoming':
+        query = query.filter(Event.tanggal >= datetime.now())
+    elif waktu == 'past':
+        query = query.filter(Event.tanggal < datetime.now())
+    harga_min = args.get('harga_min', type=float)
+    if harga_min is not None:
+        query = query.filter(Event.harga >= harga_min)
+    harga_max = args.get('harga_max', type=float)
+    if harga_max is not None:
+        query = query.filter(Event.harga <= harga_max)
+    return query
+
+def keyset_paginate(query, args, columns, decode, encode, per_page):
+    """Keyset pagination pada `columns` (urut naik, unik bersama-sama): biaya per halaman tetap.
+
+    Cursor ?after= / ?before= diubah dengan decode(cursor) menjadi nilai kolom, encode(row)
+    membuat cursor dari sebuah baris. Mengembalikan (rows, prev_cursor, next_cursor);
+    cursor None berarti tidak ada halaman ke arah itu.
+    """
+    key = db.tuple_(*columns)
+    before = args.get('before')
+    after = args.get('after')
+    if before:
+        rows = query.filter(key < db.tuple_(*decode(before))).order_by(*(column.desc() for column in columns)).limit(per_page + 1).all()
+        has_prev, has_next = len(rows) > per_page, True
+        rows = rows[:per_page][::-1]
+    else:
+        if after:
+            query = query.filter(key > db.tuple_(*decode(after)))
+        rows = query.order_by(*columns).limit(per_page + 1).all()
+        has_prev, has_next = bool(after), len(rows) > per_page
+        rows = rows[:per_page]
+    prev_cursor = encode(rows[0]) if rows and has_prev else None
+    next_cursor = encode(rows[-1]) if rows and has_next else None
+    return rows, prev_cursor, next_cursor
+
+def paginate_events(query, args, per_page=EVENTS_PER_PAGE):
+    """Keyset pagination event pada (tanggal, id); mengembalikan (events, prev_cursor, next_cursor)"""
+    return keyset_paginate(query, args, (Event.tanggal, Event.id), decode_cursor, encode_cursor, per_page)
+
+def listing_filters():
+    return {key: request.args[key] for key in ('q', 'waktu', 'harga_min', 'harga_max') if request.args.get(key)}
+
+def decode_participant_cursor(cursor):
+    try:
+        return (int(cursor),)
+    except ValueError:
+        abort(400)
+
+def paginate_participants(event_id, args, per_page=PARTICIPANTS_PER_PAGE):
+    """Keyset pagination peserta event pada Registration.id (memakai index ix_registration_event_id).
+
+    Mengembalikan (usernames, prev_cursor, next_cursor) seperti paginate_events.
+    """
+    query = (
+        db.session.query(Registration.id, User.username)
+        .join(User, Registration.user_id == User.id)
+        .filter(Registration.event_id == event_id)
+    )
+    rows, prev_cursor, next_cursor = keyset_paginate(query, args, (Registration.id,), decode_participant_cursor,
+                                                     lambda row: row.id, per_page)
+    return [row.username for row in rows], prev_cursor, next_cursor
+
+def export_registrations(fmt, event_id=None):
+    """Stream pendaftaran sebagai CSV atau JSON lines.
+
+    Baris diambil per batch lewat yield_per dan ditulis per batch, sehingga memori tetap
+    konstan berapa pun jumlah pendaftarannya. Tanpa event_id semua event diekspor.
+    """
+    if fmt not in ('csv', 'jsonl'):
+        abort(400)
+    if event_id is None:
+        columns = ['event_id', 'nama_event', 'username', 'status']
+        stmt = (
+            db.select(Registration.event_id, Event.nama_event, User.username, Registration.status)
+            .join(Event, Registration.event_id == Event.id)
+            .order_by(Registration.event_id, Registration.id)
+        )
+        filename = 'pendaftaran'
+    else:
+        columns = ['username', 'status']
+        stmt = db.select(User.username, Registration.status).where(Registration.event_id == event_id).order_by(Registration.id)
+        filename = f'peserta-event-{event_id}'
+    stmt = stmt.join(User, Registration.user_id == User.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == 'csv':
+            writer.writerow(columns)
+        for partition in db.session.execute(stmt).partitions():
+            for row in partition:
+                if fmt == 'csv':
+                    writer.writerow(row)
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, row))) + '\n')
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}.{fmt}'})
+
+def event_listing(query):
+    """Variabel template untuk halaman daftar event: satu halaman event + filter aktif + cursor"""
+    events, prev_cursor, next_cursor = paginate_events(filter_events(query, request.args), request.args)
+    return dict(events=events, filters=listing_filters(), prev_cursor=prev_cursor, next_cursor=next_cursor)
+
+def cached_fragment(key, render, tags=()):
+    """Ambil fragmen dari fragment_cache atau render baru. Tag dipakai untuk invalidasi:
+    'events' (semua daftar event), 'event:<id>' (satu event), 'participants' (username peserta).
+    """
+    if not current_app.config['FRAGMENT_CACHE_ENABLED']:
+        return render()
+    return fragment_cache().get_or_set(key, render, tags)
+
+def query_budget(max_queries):
+    """Deklarasikan jumlah query SQL maksimum untuk sebuah route (dicek oleh record_query_stats dan testing.py)"""
+    def decorator(f):
+        f.query_budget = max_queries
+        return f
+    return decorator
+
+def discard_recorded_queries():
+    """Buang query yang sudah dicatat di g (SQLALCHEMY_RECORD_QUERIES). Dipanggil per batch oleh
+    proses panjang dalam satu app context (CLI, seeder) agar parameter tiap batch tidak ditahan."""
+    g.pop('_sqlalchemy_queries', None)
+
+def current_user_is_admin():
+    """Cek status admin user yang login dengan satu query kolom, paling banyak sekali per request"""
+    if 'is_admin' not in g:
+        g.is_admin = bool(db.session.query(User.is_admin).filter_by(id=session['user_id']).scalar())
+    return g.is_admin
+
+def save_event_image():
+    """Simpan gambar dari form (jika ada). Mengembalikan (nama_file, valid); nama_file None jika tidak ada upload."""
+    file = request.files.get('gambar')
+    if not file or not file.filename:
+        return None, True
+    if not allowed_file(file.filename):
+        return None, False
+    filename = save_upload(file, current_app.config['UPLOAD_FOLDER'], current_app.config['MAX_IMAGE_PIXELS'])
+    return filename, filename is not None
+
+def _load_checkin_event(event_id):
+    # Hanya status yang bisa dijawab tanpa query yang perlu disimpan di memori
+    return db.session.execute(
+        db.select(Registration.id, Registration.status)
+        .where(Registration.event_id == event_id, Registration.status.in_(('attended', 'cancelled')))
+    ).all()
+
+def _mark_attended(event_id, registration_ids):
+    """Tandai pendaftaran sebagai attended dengan satu UPDATE bersyarat; penghitung event ikut dipindah"""
+    updated = set(db.session.execute(
+        db.update(Registration)
+        .where(Registration.id.in_(registration_ids), Registration.event_id == event_id,
+               Registration.status == 'registered')
+        .values(status='attended')
+        .returning(Registration.id)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+    if updated:
+        db.session.execute(
+            db.update(Event)
+            .where(Event.id == event_id)
+            .values(registered_count=Event.registered_count - len(updated),
+                    attended_count=Event.attended_count + len(updated))
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    rest = [registration_id for registration_id in registration_ids if registration_id not in updated]
+    others = {}
+    if rest:
+        others = dict(db.session.execute(
+            db.select(Registration.id, Registration.status)
+            .where(Registration.id.in_(rest), Registration.event_id == event_id)
+        ).all())
+    return updated, others
+
+def checkin_service():
+    return current_app.extensions['checkin']
+
+def fragment_cache():
+    return current_app.extensions['fragment_cache']
+
+def ticket_signer():
+    return ticket_serializer(current_app.config['SECRET_KEY'])
+
 def login_required(f):
     def wrapper(*args, **kwargs):
         if 'user_id' not in session:
             flash('Anda harus login terlebih dahulu.', 'error')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         return f(*args, **kwargs)
     wrapper.__name__ = f.__name__
     return wrapper
 
-@app.template_filter('currency')
+@bp.after_app_request
+def record_query_stats(response):
+    """Log jumlah query, total waktu SQL dan query paling lambat untuk setiap request"""
+    if not current_app.config['SQLALCHEMY_RECORD_QUERIES']:
+        return response
+    queries = get_recorded_queries()
+    total_ms = sum(q.duration for q in queries) * 1000
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', None)
+    slowest = sorted(queries, key=lambda q: q.duration, reverse=True)[:current_app.config['SQL_SLOW_QUERY_COUNT']]
+    current_app.logger.info('%s %s queries=%d sql_time=%.1fms slowest=%s', request.method, request.path, len(queries), total_ms,
+                    [f'{q.duration * 1000:.1f}ms {" ".join(q.statement.split())[:120]}' for q in slowest])
+    if budget is not None and len(queries) > budget:
+        current_app.logger.warning('%s melebihi query budget: %d > %d', request.endpoint, len(queries), budget)
+    if current_app.debug or current_app.testing or current_app.config['SQL_DEBUG_HEADERS']:
+        response.headers['X-Query-Count'] = str(len(queries))
+        response.headers['X-Query-Time-Ms'] = f'{total_ms:.2f}'
+        if budget is not None:
+            response.headers['X-Query-Budget'] = str(budget)
+    return response
+
+@bp.app_errorhandler(RequestEntityTooLarge)
+def request_too_large(error):
+    flash('Ukuran file terlalu besar (maksimal {} MB).'.format(current_app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)), 'error')
+    return redirect(request.url)
+
+@bp.app_template_global()
+def upload_url(filename, variant=None):
+    """URL gambar upload; pakai varian (thumb/card) jika sudah dibuat, selain itu file asli"""
+    if variant:
+        resized = variant_name(filename, variant)
+        if os.path.exists(os.path.join(current_app.config['UPLOAD_FOLDER'], resized)):
+            filename = resized
+    return url_for('main.uploaded_file', filename=filename)
+
+@bp.app_template_filter('currency')
 def currency_format(value):
     """Format angka menjadi mata uang Rupiah"""
     try:
@@ -68,44 +565,45 @@ def currency_format(value):
     except (TypeError, ValueError):
         return "Rp 0"
 
-@app.route('/')
+@bp.route('/')
+@query_budget(1)
 @login_required
 def beranda():
-    semua_event = Event.query.all()
-    user_id = session['user_id']
-    registered_events = [reg.event_id for reg in Registration.query.filter_by(user_id=user_id).all()]
-    return render_template('beranda.html', events=semua_event, registered_events=registered_events)
+    # Kartu event sama untuk semua user; flash message dirender di luar fragmen
+    key = ('beranda', tuple(sorted(request.args.items(multi=True))))
+    cards = cached_fragment(key, lambda: Markup(render_template('_event_cards.html', **event_listing(Event.query))), tags=('events',))
+    return render_template('beranda.html', cards=cards, filters=listing_filters())
 
-@app.route('/profil')
+@bp.route('/profil')
+@query_budget(2)
 @login_required
 def profil():
     user_id = session['user_id']
-    user = User.query.get(user_id)
-    registrations = Registration.query.filter_by(user_id=user_id).all()
-    registered_events = [reg.event for reg in registrations]
+    user = db.session.get(User, user_id)
+    registered_events = Event.query.join(Registration).filter(Registration.user_id == user_id).order_by(Registration.id).all()
     return render_template('profil.html', user=user, registered_events=registered_events)
 
-@app.route('/user/<username>')
+@bp.route('/user/<username>')
 def show_user_profil(username):
     return render_template('showuser.html', username=username)
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
         if User.query.filter_by(username=username).first():
             flash('Username sudah ada.', 'error')
-            return redirect(url_for('register'))
+            return redirect(url_for('main.register'))
         hashed_password = generate_password_hash(password)
         new_user = User(username=username, password=hashed_password)
         db.session.add(new_user)
         db.session.commit()
         flash('Registrasi berhasil. Silakan login.', 'success')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     return render_template('register.html')
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form['username']
@@ -115,24 +613,24 @@ def login():
             session['user_id'] = user.id
             session['username'] = user.username
             flash('Login berhasil.', 'success')
-            return redirect(url_for('beranda'))
+            return redirect(url_for('main.beranda'))
         flash('Username atau password salah.', 'error')
     return render_template('login.html')
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session.clear()
     flash('Anda telah logout.', 'success')
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
 # CRUD Routes for Events
-@app.route('/events')
+@bp.route('/events')
+@query_budget(1)
 @login_required
 def events():
-    semua_event = Event.query.all()
-    return render_template('events.html', events=semua_event)
+    return render_template('events.html', **event_listing(Event.query))
 
-@app.route('/events/add', methods=['GET', 'POST'])
+@bp.route('/events/add', methods=['GET', 'POST'])
 @login_required
 def add_event():
     if request.method == 'POST':
@@ -142,159 +640,390 @@ def add_event():
         lokasi = request.form['lokasi']
         harga = float(request.form.get('harga', 0.0))
         stok = int(request.form.get('stok', 0))
-        gambar = None
-        if 'gambar' in request.files:
-            file = request.files['gambar']
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-                gambar = filename
+        gambar, valid = save_event_image()
+        if not valid:
+            flash('File gambar tidak valid. Gunakan PNG, JPG atau GIF.', 'error')
+            return redirect(url_for('main.add_event'))
         from datetime import datetime
         event_baru = Event(nama_event=nama_event, deskripsi=deskripsi, tanggal=datetime.strptime(tanggal, '%Y-%m-%dT%H:%M'), lokasi=lokasi, gambar=gambar, user_id=session['user_id'], harga=harga, stok=stok)
         db.session.add(event_baru)
         db.session.commit()
+        fragment_cache().invalidate('events')
         flash('Event berhasil ditambahkan.', 'success')
-        return redirect(url_for('events'))
+        return redirect(url_for('main.events'))
     return render_template('add_event.html')
 
-@app.route('/events/<int:id>/edit', methods=['GET', 'POST'])
+@bp.route('/events/<int:id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_event(id):
     event = Event.query.get_or_404(id)
-    user = User.query.get(session['user_id'])
-    if event.user_id != session['user_id'] and not user.is_admin:
+    if event.user_id != session['user_id'] and not current_user_is_admin():
         flash('Anda tidak memiliki izin untuk mengedit event ini.', 'error')
-        return redirect(url_for('events'))
+        return redirect(url_for('main.events'))
     if request.method == 'POST':
         event.nama_event = request.form['nama_event']
         event.deskripsi = request.form['deskripsi']
         event.tanggal = request.form['tanggal']
         event.lokasi = request.form['lokasi']
         event.harga = float(request.form.get('harga', 0.0))
-        event.stok = int(request.form.get('stok', 0))
-        if 'gambar' in request.files:
-            file = request.files['gambar']
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-                event.gambar = filename
+        # Stok adalah sisa tiket yang terus dikurangi reserve_ticket; simpan selisih terhadap nilai saat
+        # form dibuka agar tiket yang terjual sementara itu tidak dikembalikan
+        stok_awal = request.form.get('stok_awal', type=int)
+        selisih = int(request.form.get('stok', 0)) - (event.stok if stok_awal is None else stok_awal)
+        if selisih:
+            event.stok = db.case((Event.stok + selisih < 0, 0), else_=Event.stok + selisih)
+        gambar, valid = save_event_image()
+        if not valid:
+            flash('File gambar tidak valid. Gunakan PNG, JPG atau GIF.', 'error')
+            return redirect(url_for('main.edit_event', id=id))
+        if gambar:
+            event.gambar = gambar
         from datetime import datetime
         event.tanggal = datetime.strptime(event.tanggal, '%Y-%m-%dT%H:%M')
         db.session.commit()
+        fragment_cache().invalidate('events', f'event:{id}')
         flash('Event berhasil diupdate.', 'success')
-        return redirect(url_for('events'))
+        return redirect(url_for('main.events'))
     return render_template('edit_event.html', event=event)
 
-@app.route('/events/<int:id>/delete')
+@bp.route('/events/<int:id>/delete')
 @login_required
 def delete_event(id):
     event = Event.query.get_or_404(id)
-    user = User.query.get(session['user_id'])
-    if event.user_id != session['user_id'] and not user.is_admin:
+    if event.user_id != session['user_id'] and not current_user_is_admin():
         flash('Anda tidak memiliki izin untuk menghapus event ini.', 'error')
-        return redirect(url_for('events'))
+        return redirect(url_for('main.events'))
+    # Rekap harian event ikut dihapus dalam transaksi yang sama
+    RegistrationDaily.query.filter_by(event_id=id).delete(synchronize_session=False)
     # Delete all registrations for this event first
-    registrations = Registration.query.filter_by(event_id=id).all()
-    for reg in registrations:
-        db.session.delete(reg)
+    Registration.query.filter_by(event_id=id).delete(synchronize_session=False)
     db.session.delete(event)
     db.session.commit()
+    fragment_cache().invalidate('events', f'event:{id}')
+    checkin_service().forget(id)
     flash('Event berhasil dihapus.', 'success')
-    return redirect(url_for('events'))
+    return redirect(url_for('main.events'))
 
-@app.route('/events/<int:id>')
+@bp.route('/uploads/<path:filename>')
+def uploaded_file(filename):
+    response = send_from_directory(current_app.config['UPLOAD_FOLDER'], filename, max_age=current_app.config['UPLOAD_CACHE_MAX_AGE'])
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@bp.route('/events/<int:id>')
+@query_budget(4)
 @login_required
 def event_detail(id):
-    event = Event.query.get_or_404(id)
-    registrations = Registration.query.filter_by(event_id=id).all()
-    registered_users = [reg.user.username for reg in registrations if reg.user]
+    macro = lambda name: get_template_attribute('_event_detail_shared.html', name)
+
+    def render_shared():
+        event = Event.query.get_or_404(id)
+        registered_count = event.registered_count + event.attended_count
+        return {
+            'event': {'id': event.id, 'nama_event': event.nama_event, 'stok': event.stok, 'user_id': event.user_id},
+            'hero': macro('hero')(event),
+            'info': macro('info')(event, registered_count),
+        }
+
+    def render_participants():
+        usernames, prev_cursor, next_cursor = paginate_participants(id, request.args)
+        return macro('participants')(id, usernames, prev_cursor, next_cursor)
+
+    shared = cached_fragment(('event_detail', id), render_shared, tags=(f'event:{id}',))
+    page_key = (request.args.get('after'), request.args.get('before'))
+    participants = cached_fragment(('participants', id, page_key), render_participants, tags=(f'event:{id}', 'participants'))
+    # Status pendaftaran dan akses export per user ditimpa di atas fragmen bersama
     user_id = session['user_id']
-    is_registered = Registration.query.filter_by(user_id=user_id, event_id=id).first() is not None
-    return render_template('event_detail.html', event=event, registered_users=registered_users, is_registered=is_registered)
+    registration_id = db.session.query(Registration.id).filter_by(user_id=user_id, event_id=id).scalar()
+    is_registered = registration_id is not None
+    ticket_token = make_ticket_token(ticket_signer(), registration_id, id) if is_registered else None
+    can_export = shared['event']['user_id'] == user_id or current_user_is_admin()
+    return render_template('event_detail.html', event=shared['event'], shared=shared, participants=participants,
+                           is_registered=is_registered, ticket_token=ticket_token, can_export=can_export)
+
+@bp.route('/events/<int:id>/export')
+@login_required
+def export_event_registrations(id):
+    owner_id = db.session.query(Event.user_id).filter_by(id=id).scalar()
+    if owner_id is None:
+        abort(404)
+    if owner_id != session['user_id'] and not current_user_is_admin():
+        abort(403)
+    return export_registrations(request.args.get('format', 'csv'), event_id=id)
 
-@app.route('/events/<int:id>/register')
+@bp.route('/events/<int:id>/register')
 @login_required
 def register_event(id):
-    event = Event.query.get_or_404(id)
-    user_id = session['user_id']
-    existing_registration = Registration.query.filter_by(user_id=user_id, event_id=id).first()
-    if existing_registration:
-        flash('Anda sudah terdaftar untuk event ini.', 'error')
-    else:
-        registration = Registration(user_id=user_id, event_id=id)
-        db.session.add(registration)
-        db.session.commit()
+    idempotency_key = request.headers.get('Idempotency-Key') or request.args.get('key')
+    if idempotency_key and len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        abort(400)
+    result = reserve_ticket(session['user_id'], id, idempotency_key)
+    if result == RESERVE_NOT_FOUND:
+        abort(404)
+    if result == RESERVE_OK:
+        # Stok dan daftar peserta berubah; kartu di beranda tidak menampilkan keduanya
+        fragment_cache().invalidate(f'event:{id}')
         flash('Pendaftaran event berhasil.', 'success')
-    return redirect(url_for('event_detail', id=id))
+    elif result == RESERVE_SOLD_OUT:
+        flash('Maaf, tiket untuk event ini sudah habis.', 'error')
+    elif result == RESERVE_KEY_CONFLICT:
+        flash('Idempotency key ini sudah dipakai untuk pendaftaran event lain.', 'error')
+    else:
+        flash('Anda sudah terdaftar untuk event ini.', 'error')
+    return redirect(url_for('main.event_detail', id=id))
 
 # Admin Routes
-@app.route('/admin/users')
+@bp.route('/admin/users')
+@query_budget(2)
 @login_required
 def admin_users():
-    user = User.query.get(session['user_id'])
-    if not user.is_admin:
+    if not current_user_is_admin():
         flash('Akses ditolak.', 'error')
-        return redirect(url_for('beranda'))
+        return redirect(url_for('main.beranda'))
     users = User.query.all()
     return render_template('admin_users.html', users=users)
 
-@app.route('/admin/users/<int:id>/edit', methods=['GET', 'POST'])
+@bp.route('/admin/users/<int:id>/edit', methods=['GET', 'POST'])
 @login_required
 def admin_edit_user(id):
-    user = User.query.get(session['user_id'])
-    if not user.is_admin:
+    if not current_user_is_admin():
         flash('Akses ditolak.', 'error')
-        return redirect(url_for('beranda'))
+        return redirect(url_for('main.beranda'))
     edit_user = User.query.get_or_404(id)
     if request.method == 'POST':
         edit_user.username = request.form['username']
         edit_user.is_admin = 'is_admin' in request.form
         db.session.commit()
+        fragment_cache().invalidate('participants')
         flash('User berhasil diupdate.', 'success')
-        return redirect(url_for('admin_users'))
+        return redirect(url_for('main.admin_users'))
     return render_template('admin_edit_user.html', user=edit_user)
 
-@app.route('/admin/users/<int:id>/delete')
+@bp.route('/admin/users/<int:id>/delete')
 @login_required
 def admin_delete_user(id):
-    user = User.query.get(session['user_id'])
-    if not user.is_admin:
+    if not current_user_is_admin():
         flash('Akses ditolak.', 'error')
-        return redirect(url_for('beranda'))
+        return redirect(url_for('main.beranda'))
     delete_user = User.query.get_or_404(id)
     db.session.delete(delete_user)
     db.session.commit()
+    fragment_cache().invalidate('participants')
     flash('User berhasil dihapus.', 'success')
-    return redirect(url_for('admin_users'))
+    return redirect(url_for('main.admin_users'))
 
-@app.route('/admin/events')
+@bp.route('/api/events/<int:id>/checkin', methods=['POST'])
+@login_required
+def checkin(id):
+    """Check-in satu tiket ({"token": ...}) atau batch ({"tokens": [...]}) untuk event ini."""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        payload = {}
+    single = 'token' in payload
+    tokens = [payload['token']] if single else payload.get('tokens')
+    if not isinstance(tokens, list) or not tokens or len(tokens) > current_app.config['CHECKIN_MAX_BATCH']:
+        return jsonify(error='Kirim "token" atau "tokens" (maksimal {} per request).'.format(current_app.config['CHECKIN_MAX_BATCH'])), 400
+    # Pemilik dibaca per request (bukan dari state check-in yang di-cache) agar selalu sesuai database
+    owner_id = db.session.query(Event.user_id).filter_by(id=id).scalar()
+    if owner_id is None:
+        abort(404)
+    if owner_id != session['user_id'] and not current_user_is_admin():
+        abort(403)
+    scanned = [read_ticket_token(ticket_signer(), token) if isinstance(token, str) else None for token in tokens]
+    results = [{'registration_id': registration_id, 'status': status}
+               for registration_id, status in checkin_service().scan(id, scanned)]
+    if single:
+        return jsonify(results[0])
+    return jsonify(results=results)
+
+@bp.route('/admin/registrations/export')
+@login_required
+def admin_export_registrations():
+    if not current_user_is_admin():
+        abort(403)
+    return export_registrations(request.args.get('format', 'csv'))
+
+@bp.route('/admin/cache')
+@login_required
+def admin_cache_stats():
+    if not current_user_is_admin():
+        abort(403)
+    return jsonify(fragment_cache().stats())
+
+@bp.route('/admin/events')
+@query_budget(2)
 @login_required
 def admin_events():
-    user = User.query.get(session['user_id'])
-    if not user.is_admin:
+    if not current_user_is_admin():
         flash('Akses ditolak.', 'error')
-        return redirect(url_for('beranda'))
-    events = Event.query.all()
-    return render_template('admin_events.html', events=events)
+        return redirect(url_for('main.beranda'))
+    # Tabel admin tidak menampilkan deskripsi; username pembuat ikut dimuat lewat JOIN, bukan per baris
+    query = Event.query.options(db.defer(Event.deskripsi), db.joinedload(Event.user).load_only(User.username))
+    return render_template('admin_events.html', **event_listing(query))
+
+@bp.route('/admin/dashboard')
+@query_budget(4)
+@login_required
+def admin_dashboard():
+    if not current_user_is_admin():
+        flash('Akses ditolak.', 'error')
+        return redirect(url_for('main.beranda'))
+    # Semua angka dibaca dari penghitung di tabel event dan rekap harian, tidak pernah dari scan registration
+    sold = Event.registered_count + Event.attended_count
+    totals = db.session.execute(db.select(
+        db.func.count(Event.id).label('events'),
+        db.func.coalesce(db.func.sum(Event.registered_count), 0).label('registered'),
+        db.func.coalesce(db.func.sum(Event.attended_count), 0).label('attended'),
+        db.func.coalesce(db.func.sum(Event.cancelled_count), 0).label('cancelled'),
+        db.func.coalesce(db.func.sum(Event.stok), 0).label('stok'),
+        db.func.coalesce(db.func.sum(Event.revenue), 0.0).label('revenue'),
+    )).one()
+    top_events = (
+        Event.query
+        .options(db.load_only(Event.nama_event, Event.stok, Event.registered_count, Event.attended_count, Event.revenue))
+        .order_by(sold.desc())
+        .limit(DASHBOARD_TOP_EVENTS)
+        .all()
+    )
+    start = date.today() - timedelta(days=DASHBOARD_TREND_DAYS - 1)
+    rollup = {row.day: row for row in db.session.query(
+        RegistrationDaily.day,
+        db.func.sum(RegistrationDaily.registrations).label('registrations'),
+        db.func.sum(RegistrationDaily.revenue).label('revenue'),
+    ).filter(RegistrationDaily.day >= start).group_by(RegistrationDaily.day)}
+    # Hari tanpa pendaftaran tetap ditampilkan sebagai nol
+    trend = []
+    for offset in range(DASHBOARD_TREND_DAYS):
+        day = start + timedelta(days=offset)
+        row = rollup.get(day)
+        trend.append({'day': day, 'registrations': row.registrations if row else 0, 'revenue': row.revenue if row else 0.0})
+    return render_template('admin_dashboard.html', totals=totals, top_events=top_events, trend=trend,
+                           trend_max=max(item['registrations'] for item in trend) or 1)
+
+@bp.cli.command('rebuild-counters')
+@click.option('--check', is_flag=True, help='Hanya laporkan event yang penghitungnya tidak cocok.')
+def rebuild_counters_command(check):
+    """Periksa dan bangun ulang penghitung pendaftaran serta rekap harian."""
+    with db.engine.connect() as conn:
+        events, days = count_counter_mismatches(conn)
+        click.echo(f'{events} event dengan penghitung tidak cocok, {days} baris rekap harian tidak cocok.')
+        if check:
+            return
+        rebuild_counters(conn)
+        conn.commit()
+    click.echo('Penghitung dan rekap harian sudah dibangun ulang.')
+
+@bp.cli.command('migrate')
+@click.option('--status', is_flag=True, help='Tampilkan status migrasi tanpa menerapkannya.')
+def migrate_command(status):
+    """Terapkan migrasi schema database yang belum dijalankan."""
+    import migrations
+    if status:
+        applied = migrations.applied_versions(db.engine)
+        for version, name, _ in migrations.MIGRATIONS:
+            click.echo(f"{'x' if version in applied else ' '} {version:04d} {name}")
+        return
+    if not migrations.upgrade(db.engine, log=click.echo):
+        click.echo('Database sudah versi terbaru.')
+
+@bp.cli.command('generate-variants')
+def generate_variants_command():
+    """Buat varian thumb/card untuk gambar yang diupload sebelum pipeline upload ada."""
+    folder = current_app.config['UPLOAD_FOLDER']
+    variant_suffixes = tuple(f'_{variant}.jpg' for variant in VARIANTS)
+    for filename in sorted(os.listdir(folder)):
+        if allowed_file(filename) and not filename.endswith(variant_suffixes):
+            try:
+                generate_variants(folder, filename, current_app.config['MAX_IMAGE_PIXELS'])
+            except IMAGE_ERRORS as error:
+                click.echo(f'{filename}: gagal dibaca ({error})', err=True)
+                continue
+            click.echo(filename)
+
+@bp.cli.command('import-users')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Default: ditebak dari ekstensi file.')
+@click.option('--batch-size', default=1000, show_default=True, help='Jumlah baris per bulk INSERT.')
+@click.option('--workers', type=int, help='Jumlah proses untuk hashing password (default: jumlah CPU).')
+@click.option('--hash-method', help='Metode generate_password_hash, misalnya pbkdf2:sha256:600000.')
+@click.option('--conflicts', 'conflicts_path', type=click.Path(dir_okay=False, writable=True),
+              help='Tulis username yang konflik ke file ini.')
+def import_users_command(path, fmt, batch_size, workers, hash_method, conflicts_path):
+    """Import user massal dari file CSV atau JSON lines."""
+    import user_import
+    # File divalidasi penuh lebih dulu agar baris rusak di tengah file tidak meninggalkan import setengah jadi
+    total = user_import.count_users(path, fmt)
+    click.echo(f'{total} baris valid.')
+    rows = user_import.read_users(path, fmt)
+    imported, conflicts = user_import.import_users(rows, batch_size, workers, hash_method, progress=click.echo)
+    click.echo(f'Selesai: {imported} user diimport, {len(conflicts)} username sudah ada atau duplikat.')
+    if conflicts_path:
+        with open(conflicts_path, 'w', encoding='utf-8') as f:
+            f.writelines(f'{username}\n' for username in conflicts)
+    elif conflicts:
+        click.echo('Contoh konflik: ' + ', '.join(conflicts[:10]))
+
+def engine_options(config):
+    """Opsi create_engine dari config: pool per worker, plus timeout untuk SQLite atau pre-ping untuk server DB"""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite':
+        options = {'connect_args': {'timeout': config['SQLITE_PRAGMAS'].get('busy_timeout', 5000) / 1000,
+                                    'check_same_thread': False}}
+        if url.database in (None, '', ':memory:'):
+            return options  # SQLite in-memory memakai pool khusus tanpa ukuran
+    else:
+        options = {'pool_pre_ping': True, 'pool_recycle': 1800}
+    options.update(pool_size=config['DB_POOL_SIZE'], max_overflow=config['DB_MAX_OVERFLOW'],
+                   pool_timeout=config['DB_POOL_TIMEOUT'])
+    return options
+
+def _sqlite_pragma_listener(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return set_pragmas
+
+def create_app(config=None):
+    """Buat aplikasi Flask. Urutan config: Config, env FLASK_*, DATABASE_URL, lalu argumen config."""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'uploads')
+    app.config.from_prefixed_env()
+    if os.environ.get('DATABASE_URL'):
+        app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['DATABASE_URL']
+    app.config.update(config or {})
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    if app.config['SQLALCHEMY_RECORD_QUERIES'] is None:
+        app.config['SQLALCHEMY_RECORD_QUERIES'] = app.debug or app.testing or app.config['SQL_DEBUG_HEADERS']
+    if app.config['SQLALCHEMY_RECORD_QUERIES'] and not app.logger.level:
+        # Ringkasan per request di-log pada level INFO, yang di luar debug dibuang logger default
+        app.logger.setLevel(logging.INFO)
+
+    db.init_app(app)
+    with app.app_context():
+        # Tidak membuka koneksi di sini, sehingga aman dipakai dengan `gunicorn --preload`
+        if db.engine.dialect.name == 'sqlite' and app.config['SQLITE_PRAGMAS']:
+            db.event.listen(db.engine, 'connect', _sqlite_pragma_listener(app.config['SQLITE_PRAGMAS']))
+
+    app.extensions['fragment_cache'] = FragmentCache(app.config['FRAGMENT_CACHE_SIZE'], app.config['FRAGMENT_CACHE_TTL'])
+    app.extensions['checkin'] = CheckinService(_load_checkin_event, _mark_attended,
+                                               app.config['CHECKIN_STATE_SIZE'], app.config['CHECKIN_STATE_TTL'])
+    app.register_blueprint(bp)
+
+    # Ensure upload folder exists
+    if not os.path.exists(app.config['UPLOAD_FOLDER']):
+        os.makedirs(app.config['UPLOAD_FOLDER'])
+    return app
 
 if __name__ == '__main__':
+    import migrations
+    app = create_app({'DEBUG': True})
     with app.app_context():
-        db.create_all()
-        # Create admin user if not exists
-        admin_user = User.query.filter_by(username='admin').first()
-        if not admin_user:
-            hashed_password = generate_password_hash('admin123')
-            admin_user = User(username='admin', password=hashed_password, is_admin=True)
-            db.session.add(admin_user)
-            db.session.commit()
-        # Update existing events to have default values for new fields
-        events = Event.query.all()
-        for event in events:
-            if event.user_id is None:
-                event.user_id = admin_user.id if admin_user else 1
-            if event.harga is None:
-                event.harga = 0.0
-            if event.stok is None:
-                event.stok = 0
-        db.session.commit()
+        # Cek ringan (satu query), migrasi dijalankan lewat `flask migrate`, bukan saat start
+        pending = migrations.pending_migrations(db.engine)
+        if pending:
+            app.logger.warning('%d migrasi belum diterapkan, jalankan `flask migrate`.', len(pending))
     app.run(debug=True)
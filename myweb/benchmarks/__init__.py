@@ -0,0 +1,11 @@
+"""Benchmark dan load test untuk Sistem Pendaftaran Event.
+
+Jalankan dari folder myweb, misalnya: python -m benchmarks.loadtest
+
+- seed: generator data sintetis (bulk insert)
+- loadtest: latency p50/p95/p99, req/s dan peak RSS per route, hasil JSON
+- reservation: konkurensi reserve_ticket (tanpa oversell)
+- home_cache: req/s beranda/detail dengan dan tanpa fragment cache
+- checkin: throughput API check-in
+- sqlite_concurrency: baca/tulis multi-proses, SQLite default vs tuning
+"""
@@ -0,0 +1,88 @@
+"""Load test check-in: beberapa scanner paralel mengirim batch token ke /api/events/<id>/checkin.
+
+Sebagian scan sengaja berupa duplikat dan token palsu. Batch dibagi bergiliran ke
+beberapa instance app (masing-masing dengan state check-in dan engine sendiri, seperti
+worker gunicorn). Di akhir dicek bahwa setiap tiket dijawab 'checked_in' tepat sekali
+dan jumlah 'attended' di database sama dengan jumlah pendaftaran unik yang di-scan.
+
+    python -m benchmarks.checkin --registrations 20000 --scanners 8 --batch 100 --workers 4
+"""
+import argparse
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from benchmarks.common import login, use_temp_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--registrations', type=int, default=20000, help='jumlah peserta event')
+    parser.add_argument('--scanners', type=int, default=8, help='jumlah scanner (thread) paralel')
+    parser.add_argument('--batch', type=int, default=100, help='token per request')
+    parser.add_argument('--workers', type=int, default=4, help='jumlah instance app (mensimulasikan worker)')
+    parser.add_argument('--duplicates', type=float, default=0.1, help='porsi scan ulang tiket yang sama')
+    parser.add_argument('--invalid', type=float, default=0.02, help='porsi token palsu')
+    args = parser.parse_args()
+
+    use_temp_database('checkin')
+    from app import create_app, db, User, Event, Registration, rebuild_counters
+    from checkin import make_ticket_token, ticket_serializer
+    import migrations
+
+    apps = [create_app() for _ in range(args.workers)]
+    app = apps[0]
+    tickets = ticket_serializer(app.config['SECRET_KEY'])
+
+    with app.app_context():
+        migrations.upgrade(db.engine, log=lambda message: None)
+        db.session.execute(db.insert(User), [
+            {'username': f'bench{i}', 'password': 'x', 'is_admin': i == 0} for i in range(args.registrations)
+        ])
+        db.session.add(Event(nama_event='Konser', deskripsi='benchmark', tanggal=datetime(2030, 1, 1),
+                             lokasi='Stadion', user_id=1, harga=0.0, stok=args.registrations))
+        db.session.flush()
+        db.session.execute(db.insert(Registration), [
+            {'user_id': user_id, 'event_id': 1, 'status': 'registered'} for user_id in range(1, args.registrations + 1)
+        ])
+        rebuild_counters(db.session.connection())
+        db.session.commit()
+        registration_ids = db.session.execute(db.select(Registration.id)).scalars().all()
+
+    rng = random.Random(42)
+    tokens = [make_ticket_token(tickets, rid, 1) for rid in registration_ids]
+    scans = tokens + rng.sample(tokens, int(len(tokens) * args.duplicates))
+    scans += ['palsu.' + token[:20] for token in rng.sample(tokens, int(len(tokens) * args.invalid))]
+    rng.shuffle(scans)
+    batches = [scans[i:i + args.batch] for i in range(0, len(scans), args.batch)]
+
+    def scanner(numbered_batch):
+        number, batch = numbered_batch
+        client = apps[number % len(apps)].test_client()
+        login(client, 1)
+        response = client.post('/api/events/1/checkin', json={'tokens': batch})
+        return Counter(result['status'] for result in response.get_json()['results'])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.scanners) as pool:
+        totals = sum(pool.map(scanner, enumerate(batches)), Counter())
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        attended = db.session.query(Registration).filter_by(status='attended').count()
+        attended_count = db.session.get(Event, 1).attended_count
+
+    print(f'scans         : {len(scans)} dalam {len(batches)} request, {args.scanners} scanner, {args.workers} worker')
+    print(f'hasil         : {dict(totals)}')
+    print(f'waktu         : {elapsed:.2f}s, {len(scans) / elapsed:.0f} scan/s')
+    print(f'attended (DB) : {attended}, attended_count {attended_count}')
+    if attended != len(registration_ids) or totals['checked_in'] != len(registration_ids) or attended_count != attended:
+        print('GAGAL: jumlah check-in tidak konsisten')
+        raise SystemExit(1)
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+"""Helper bersama untuk benchmark."""
+import os
+import tempfile
+
+
+def use_temp_database(prefix):
+    """Arahkan app ke database SQLite sementara lewat DATABASE_URL. Harus dipanggil sebelum create_app()."""
+    tmpdir = tempfile.mkdtemp(prefix=f'bench-{prefix}-')
+    path = os.path.join(tmpdir, 'bench.db')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    return path
+
+
+def login(client, user_id):
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
@@ -0,0 +1,68 @@
+"""Benchmark request per detik halaman beranda dan detail event, tanpa dan dengan fragment cache.
+
+    python -m benchmarks.home_cache --events 5000 --requests 2000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import login, use_temp_database
+
+
+def measure(client, paths, requests):
+    started = time.perf_counter()
+    for i in range(requests):
+        response = client.get(paths[i % len(paths)])
+        assert response.status_code == 200, response.status_code
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=5000, help='jumlah event di database')
+    parser.add_argument('--registrations', type=int, default=200, help='pendaftaran untuk event yang dibuka di detail')
+    parser.add_argument('--requests', type=int, default=2000, help='jumlah request per skenario')
+    args = parser.parse_args()
+
+    use_temp_database('home-cache')
+    from app import create_app, db, User, Event, Registration, rebuild_counters
+    import migrations
+
+    app = create_app()
+    fragment_cache = app.extensions['fragment_cache']
+
+    with app.app_context():
+        migrations.upgrade(db.engine, log=lambda message: None)
+        db.session.execute(db.insert(User), [
+            {'username': f'bench{i}', 'password': 'x', 'is_admin': i == 0} for i in range(args.registrations)
+        ])
+        start = datetime(2030, 1, 1)
+        db.session.execute(db.insert(Event), [
+            {'nama_event': f'Event {i}', 'deskripsi': 'Deskripsi event benchmark. ' * 20,
+             'tanggal': start + timedelta(hours=i), 'lokasi': 'Jakarta', 'user_id': 1, 'harga': 50000.0, 'stok': 100}
+            for i in range(args.events)
+        ])
+        db.session.execute(db.insert(Registration), [
+            {'user_id': user_id, 'event_id': 1, 'status': 'registered'} for user_id in range(1, args.registrations + 1)
+        ])
+        rebuild_counters(db.session.connection())
+        db.session.commit()
+
+    client = app.test_client()
+    login(client, 1)
+    scenarios = {
+        'beranda': ['/', '/?waktu=upcoming'],
+        'event_detail': ['/events/1', '/events/2', '/events/3'],
+    }
+    for name, paths in scenarios.items():
+        app.config['FRAGMENT_CACHE_ENABLED'] = False
+        before = measure(client, paths, args.requests)
+        app.config['FRAGMENT_CACHE_ENABLED'] = True
+        fragment_cache.clear()
+        after = measure(client, paths, args.requests)
+        print(f'{name:13s}: tanpa cache {before:7.0f} req/s, dengan cache {after:7.0f} req/s ({after / before:.1f}x)')
+    print(f'cache stats  : {fragment_cache.stats()}')
+
+
+if __name__ == '__main__':
+    main()
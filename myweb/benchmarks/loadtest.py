@@ -0,0 +1,229 @@
+"""Load driver in-process untuk route utama, dengan hasil JSON yang bisa dibandingkan antar commit.
+
+Request dijalankan lewat Flask test client (tanpa jaringan) dari beberapa thread.
+Route selain login memakai session yang sudah login, sehingga biaya
+check_password_hash hanya muncul di skenario 'login' dan di bagian 'password_hash'.
+
+    python -m benchmarks.loadtest --requests 500 --output hasil.json
+    python -m benchmarks.loadtest --users 100 --events 2000 --registrations 50000   # cepat
+
+Seeding dijalankan di proses terpisah agar memori seeding tidak ikut terukur. Untuk
+setiap route, rss_start_mb adalah RSS saat route dimulai dan rss_growth_mb adalah
+kenaikan RSS tertinggi selama route berjalan (disampel oleh thread terpisah, Linux).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from benchmarks.common import login, use_temp_database
+from benchmarks.seed import BENCH_PASSWORD, seed
+
+RSS_SAMPLE_INTERVAL = 0.02
+
+
+def current_rss_mb():
+    """RSS proses saat ini dari /proc (Linux); None di platform lain"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+class RssSampler:
+    """Sampel RSS di thread terpisah selama blok with; growth_mb = puncak dikurangi RSS awal"""
+
+    def __enter__(self):
+        self.start_mb = current_rss_mb()
+        self.peak_mb = self.start_mb
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        if self.start_mb is not None:
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def report(self):
+        if self.start_mb is None:
+            return {'rss_start_mb': None, 'rss_growth_mb': None}
+        return {'rss_start_mb': round(self.start_mb, 1), 'rss_growth_mb': round(self.peak_mb - self.start_mb, 1)}
+
+
+def _seed_process(users, events, registrations, results):
+    from app import create_app, db
+    import migrations
+
+    app = create_app()
+    with app.app_context():
+        migrations.upgrade(db.engine, log=lambda message: None)
+        results.put(seed(users, events, registrations, log=lambda message: print('seed:', message)))
+
+
+def seed_in_subprocess(users, events, registrations):
+    """Seed database (DATABASE_URL dari environment) di proses baru; kembalikan durasi per tabel"""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_seed_process, args=(users, events, registrations, results))
+    process.start()
+    while True:
+        try:
+            timings = results.get(timeout=1)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                raise SystemExit(f'seeding gagal (exit code {process.exitcode})')
+    process.join()
+    return timings
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(latencies, elapsed, errors):
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    cuts = statistics.quantiles(latencies_ms, n=100, method='inclusive') if len(latencies_ms) > 1 else latencies_ms * 99
+    return {
+        'requests': len(latencies_ms),
+        'errors': errors,
+        'rps': round(len(latencies_ms) / elapsed, 1),
+        'p50_ms': round(cuts[49], 2),
+        'p95_ms': round(cuts[94], 2),
+        'p99_ms': round(cuts[98], 2),
+        'max_ms': round(latencies_ms[-1], 2),
+    }
+
+
+def run_route(app, make_request, requests, threads, user_ids):
+    """Jalankan make_request(client, rng) sebanyak `requests` kali dari `threads` thread"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    per_thread = [requests // threads + (1 if i < requests % threads else 0) for i in range(threads)]
+
+    def worker(index):
+        nonlocal errors
+        rng = random.Random(index)
+        client = app.test_client()
+        login(client, rng.choice(user_ids))
+        local, local_errors = [], 0
+        for _ in range(per_thread[index]):
+            started = time.perf_counter()
+            response = make_request(client, rng)
+            response.get_data()
+            local.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    started = time.perf_counter()
+    with RssSampler() as rss, ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    elapsed = time.perf_counter() - started
+    return {**summarize(latencies, elapsed, errors), **rss.report()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--registrations', type=int, default=1_000_000)
+    parser.add_argument('--requests', type=int, default=300, help='request per route')
+    parser.add_argument('--login-requests', type=int, default=20, help='request login (lambat karena hashing)')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--no-cache', action='store_true', help='matikan fragment cache')
+    parser.add_argument('--routes', help='daftar route dipisah koma (default: semua)')
+    parser.add_argument('--output', help='tulis hasil JSON ke file ini')
+    args = parser.parse_args()
+
+    database = use_temp_database('loadtest')
+    seed_timings = seed_in_subprocess(args.users, args.events, args.registrations)
+    from app import create_app
+
+    app = create_app({'FRAGMENT_CACHE_ENABLED': not args.no_cache})
+
+    user_ids = list(range(2, args.users + 1)) or [1]
+    event_ids = range(1, args.events + 1)
+    admin_routes = {'admin_users', 'admin_events', 'admin_dashboard'}
+    scenarios = {
+        'login': lambda client, rng: client.post('/login', data={'username': f'user{rng.randrange(args.users)}',
+                                                                 'password': BENCH_PASSWORD}),
+        'beranda': lambda client, rng: client.get('/'),
+        'beranda_search': lambda client, rng: client.get('/?q=konser&waktu=upcoming'),
+        'event_detail': lambda client, rng: client.get(f'/events/{rng.choice(event_ids)}'),
+        'register_event': lambda client, rng: client.get(f'/events/{rng.choice(event_ids)}/register'),
+        'profil': lambda client, rng: client.get('/profil'),
+        'admin_users': lambda client, rng: client.get('/admin/users'),
+        'admin_events': lambda client, rng: client.get('/admin/events'),
+        'admin_dashboard': lambda client, rng: client.get('/admin/dashboard'),
+    }
+    selected = args.routes.split(',') if args.routes else list(scenarios)
+
+    results = {}
+    for name in selected:
+        requests = args.login_requests if name == 'login' else args.requests
+        # user0 (id 1) adalah admin hasil seed
+        results[name] = run_route(app, scenarios[name], requests, args.threads, [1] if name in admin_routes else user_ids)
+        print(f'{name:15s} {results[name]["rps"]:8.1f} req/s  p50 {results[name]["p50_ms"]:7.2f}ms  '
+              f'p95 {results[name]["p95_ms"]:7.2f}ms  p99 {results[name]["p99_ms"]:7.2f}ms  '
+              f'error {results[name]["errors"]}  rss +{results[name]["rss_growth_mb"]} MB')
+
+    # Biaya hashing password dilaporkan terpisah agar tidak menutupi route lain
+    hashed = generate_password_hash(BENCH_PASSWORD)
+    samples = []
+    for _ in range(5):
+        started = time.perf_counter()
+        check_password_hash(hashed, BENCH_PASSWORD)
+        samples.append(time.perf_counter() - started)
+    password_hash = {'method': hashed.split('$', 1)[0], 'check_ms': round(statistics.median(samples) * 1000, 2)}
+    print(f'check_password_hash ({password_hash["method"]}): {password_hash["check_ms"]} ms per panggilan')
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'database': database,
+            'args': vars(args),
+            'seed_seconds': {table: round(seconds, 2) for table, seconds in seed_timings.items()},
+        },
+        'routes': results,
+        'password_hash': password_hash,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print('hasil ditulis ke', args.output)
+
+
+if __name__ == '__main__':
+    main()
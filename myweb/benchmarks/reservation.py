@@ -0,0 +1,81 @@
+"""Benchmark konkurensi untuk reserve_ticket.
+
+Ratusan pendaftaran paralel ke satu event dengan stok terbatas, termasuk retry
+dengan idempotency key yang sama. Di akhir dicek bahwa tidak ada oversell:
+jumlah pendaftaran == stok awal - stok akhir, dan tidak melebihi stok awal.
+
+    python -m benchmarks.reservation --users 500 --stok 200 --workers 64
+"""
+import argparse
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import use_temp_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=500, help='jumlah user yang mendaftar')
+    parser.add_argument('--stok', type=int, default=200, help='stok tiket event')
+    parser.add_argument('--workers', type=int, default=64, help='jumlah thread paralel')
+    parser.add_argument('--retries', type=int, default=2, help='berapa kali tiap user mengirim ulang request yang sama')
+    args = parser.parse_args()
+
+    use_temp_database('reservation')
+    from datetime import datetime
+    from app import create_app, db, User, Event, Registration, reserve_ticket
+
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(User), [
+            {'username': f'bench{i}', 'password': 'x', 'is_admin': False} for i in range(args.users)
+        ])
+        owner_id = db.session.execute(db.select(User.id).limit(1)).scalar()
+        event = Event(nama_event='Flash Sale', deskripsi='benchmark', tanggal=datetime(2030, 1, 1),
+                      lokasi='Online', user_id=owner_id, harga=0.0, stok=args.stok)
+        db.session.add(event)
+        db.session.commit()
+        event_id = event.id
+        user_ids = db.session.execute(db.select(User.id)).scalars().all()
+
+    # Setiap user mengirim request yang sama beberapa kali (mensimulasikan retry klien)
+    attempts = [(uid, f'key-{uid}') for uid in user_ids for _ in range(args.retries)]
+
+    def attempt(item):
+        user_id, key = item
+        with app.app_context():
+            return reserve_ticket(user_id, event_id, key)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = Counter(pool.map(attempt, attempts))
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        registrations = db.session.query(Registration).filter_by(event_id=event_id).count()
+        distinct_users = db.session.query(Registration.user_id).filter_by(event_id=event_id).distinct().count()
+        event = db.session.get(Event, event_id)
+        stok_akhir = event.stok
+        registered_count = event.registered_count
+
+    print(f'requests      : {len(attempts)} ({args.users} user x {args.retries}) dengan {args.workers} thread')
+    print(f'hasil         : {dict(results)}')
+    print(f'pendaftaran   : {registrations} (user unik {distinct_users}), stok {args.stok} -> {stok_akhir}')
+    print(f'penghitung    : registered_count {registered_count}')
+    print(f'waktu         : {elapsed:.3f}s, {len(attempts) / elapsed:.0f} req/s')
+
+    oversold = registrations > args.stok or registrations != args.stok - stok_akhir or distinct_users != registrations
+    if oversold:
+        print('GAGAL: terjadi oversell atau pendaftaran ganda')
+        raise SystemExit(1)
+    if registered_count != registrations:
+        print('GAGAL: registered_count tidak sama dengan jumlah pendaftaran')
+        raise SystemExit(1)
+    print('OK: tidak ada oversell')
+
+
+if __name__ == '__main__':
+    main()
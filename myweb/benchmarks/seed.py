@@ -0,0 +1,114 @@
+"""Generator data sintetis untuk benchmark.
+
+Semua user memakai password yang sama (BENCH_PASSWORD) sehingga hanya satu kali
+generate_password_hash. Data dimasukkan dengan bulk INSERT per chunk.
+
+    python -m benchmarks.seed --users 1000 --events 20000 --registrations 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from benchmarks.common import use_temp_database
+
+BENCH_PASSWORD = 'benchmark'
+CHUNK_SIZE = 50_000
+LOKASI = ['Jakarta', 'Bandung', 'Surabaya', 'Yogyakarta', 'Medan', 'Makassar', 'Denpasar', 'Semarang']
+KATA = ['konser', 'seminar', 'workshop', 'turnamen', 'festival', 'pameran', 'webinar', 'bootcamp', 'musik', 'teknologi']
+
+
+def _insert_chunks(table, rows):
+    from app import db, discard_recorded_queries
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            db.session.execute(db.insert(table.__table__), chunk)
+            discard_recorded_queries()
+            chunk = []
+    if chunk:
+        db.session.execute(db.insert(table.__table__), chunk)
+        discard_recorded_queries()
+
+
+def seed(users=1000, events=20000, registrations=1_000_000, seed_value=42, log=print):
+    """Isi database app yang aktif (butuh app context). Mengembalikan durasi per tabel dalam detik."""
+    from app import db, User, Event, Registration, rebuild_counters
+
+    rng = random.Random(seed_value)
+    timings = {}
+    password = generate_password_hash(BENCH_PASSWORD)
+    registrations = min(registrations, users * events)
+
+    started = time.perf_counter()
+    _insert_chunks(User, ({'username': f'user{i}', 'password': password, 'is_admin': i == 0} for i in range(users)))
+    db.session.commit()
+    timings['users'] = time.perf_counter() - started
+    log(f'{users} user dalam {timings["users"]:.1f}s')
+
+    started = time.perf_counter()
+    now = datetime.now()
+    prices = [float(rng.choice([0, 25000, 50000, 100000, 250000])) for _ in range(events)]
+    _insert_chunks(Event, ({
+        'nama_event': f'{rng.choice(KATA).title()} {rng.choice(KATA)} {i}',
+        'deskripsi': ' '.join(rng.choices(KATA, k=40)),
+        'tanggal': now + timedelta(hours=rng.randint(-24 * 365, 24 * 365)),
+        'lokasi': rng.choice(LOKASI),
+        'user_id': rng.randint(1, users),
+        'harga': prices[i],
+        'stok': 1_000_000,
+    } for i in range(events)))
+    db.session.commit()
+    timings['events'] = time.perf_counter() - started
+    log(f'{events} event dalam {timings["events"]:.1f}s')
+
+    started = time.perf_counter()
+    # Pasangan (user, event) unik diambil dari ruang users x events tanpa membuat semua pasangan
+    pairs = sorted(rng.sample(range(users * events), registrations))
+    _insert_chunks(Registration, ({
+        'user_id': pair % users + 1,
+        'event_id': pair // users + 1,
+        'status': 'registered',
+        'harga': prices[pair // users],
+        'created_at': now - timedelta(minutes=rng.randint(0, 60 * 24 * 60)),
+    } for pair in pairs))
+    db.session.commit()
+    timings['registrations'] = time.perf_counter() - started
+    log(f'{registrations} pendaftaran dalam {timings["registrations"]:.1f}s')
+
+    # Bulk INSERT melewati reserve_ticket, jadi penghitung event dan rekap harian dibangun sekali di akhir
+    started = time.perf_counter()
+    rebuild_counters(db.session.connection())
+    db.session.commit()
+    timings['counters'] = time.perf_counter() - started
+    log(f'penghitung dan rekap harian dalam {timings["counters"]:.1f}s')
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--registrations', type=int, default=1_000_000)
+    parser.add_argument('--database', help='URL database tujuan (default: file SQLite sementara)')
+    args = parser.parse_args()
+
+    if args.database:
+        import os
+        os.environ['DATABASE_URL'] = args.database
+    else:
+        print('database:', use_temp_database('seed'))
+    from app import create_app, db
+    import migrations
+
+    app = create_app()
+    with app.app_context():
+        migrations.upgrade(db.engine, log=lambda message: None)
+        seed(args.users, args.events, args.registrations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Throughput baca/tulis bersamaan dari beberapa proses worker, SQLite default vs SQLite yang di-tuning.
+
+Setiap proses membuat app sendiri lewat create_app (seperti worker gunicorn).
+Proses pembaca mengambil halaman pertama daftar event, sedangkan proses penulis
+memesan tiket lewat reserve_ticket. Skenario 'default' memakai journal_mode=DELETE
+tanpa PRAGMA tambahan, dan skenario 'tuned' memakai Config.SQLITE_PRAGMAS (WAL dan lainnya).
+
+    python -m benchmarks.sqlite_concurrency --readers 4 --writers 2 --seconds 5
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from datetime import datetime
+
+from benchmarks.common import use_temp_database
+
+SCENARIOS = {
+    'default': {'SQLITE_PRAGMAS': {'journal_mode': 'DELETE'}},
+    'tuned': {},
+}
+
+
+def _worker(role, index, overrides, seconds, results):
+    from sqlalchemy.exc import OperationalError
+    from app import create_app, db, Event, reserve_ticket
+
+    app = create_app(overrides)
+    done = errors = 0
+    deadline = time.perf_counter() + seconds
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            try:
+                if role == 'reader':
+                    Event.query.order_by(Event.tanggal, Event.id).limit(20).all()
+                    db.session.rollback()
+                else:
+                    user_id = index * 1_000_000 + done + 1  # user_id unik, tidak perlu ada di tabel user
+                    reserve_ticket(user_id, 1)
+                done += 1
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+    results.put((role, done, errors))
+
+
+def run(overrides, readers, writers, seconds):
+    ctx = multiprocessing.get_context('fork' if hasattr(os, 'fork') else 'spawn')
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=('reader', i, overrides, seconds, results)) for i in range(readers)]
+    workers += [ctx.Process(target=_worker, args=('writer', i, overrides, seconds, results)) for i in range(writers)]
+    for worker in workers:
+        worker.start()
+    totals = {'reader': [0, 0], 'writer': [0, 0]}
+    for _ in workers:
+        role, done, errors = results.get()
+        totals[role][0] += done
+        totals[role][1] += errors
+    for worker in workers:
+        worker.join()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--events', type=int, default=5000)
+    args = parser.parse_args()
+
+    for name, overrides in SCENARIOS.items():
+        path = use_temp_database(f'sqlite-{name}')
+        from app import create_app, db, Event, User
+        import migrations
+
+        app = create_app(overrides)
+        with app.app_context():
+            migrations.upgrade(db.engine, log=lambda message: None)
+            db.session.add(User(username='owner', password='x'))
+            db.session.execute(db.insert(Event), [
+                {'nama_event': f'Event {i}', 'deskripsi': 'benchmark', 'tanggal': datetime(2030, 1, 1),
+                 'lokasi': 'Jakarta', 'user_id': 1, 'harga': 0.0, 'stok': 10_000_000}
+                for i in range(args.events)
+            ])
+            db.session.commit()
+            db.engine.dispose()  # Jangan wariskan koneksi ke proses worker
+
+        totals = run(overrides, args.readers, args.writers, args.seconds)
+        reads, read_errors = totals['reader']
+        writes, write_errors = totals['writer']
+        print(f'{name:8s}: {reads / args.seconds:8.0f} read/s, {writes / args.seconds:7.0f} write/s, '
+              f'error lock {read_errors + write_errors} ({path})')
+
+
+if __name__ == '__main__':
+    main()
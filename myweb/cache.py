@@ -0,0 +1,108 @@
+"""Cache fragmen HTML in-process dengan eviksi LRU, TTL dan invalidasi berbasis tag.
+
+Setiap entri diberi tag (misalnya 'events' atau 'event:12') sehingga route yang
+mengubah data bisa membuang tepat entri yang terpengaruh. Cache ini per proses:
+jika app dijalankan dengan beberapa worker, TTL menjadi batas atas data basi di
+worker lain.
+
+Setiap tag juga punya nomor generasi yang dinaikkan oleh invalidate. get_or_set
+mencatat generasi sebelum render, dan hasil render tidak disimpan jika generasi
+salah satu tag berubah selama render (datanya mungkin dibaca sebelum perubahan).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class FragmentCache:
+    def __init__(self, max_entries=1024, ttl=60, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}  # tag -> set(key)
+        self._generations = {}  # tag -> jumlah invalidasi
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_skips = 0
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def generations(self, tags):
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def set(self, key, value, tags=(), generations=None):
+        """Simpan nilai; jika generations (dari generations(tags)) sudah berubah, nilai tidak disimpan"""
+        with self._lock:
+            if generations is not None and generations != tuple(self._generations.get(tag, 0) for tag in tags):
+                self.stale_skips += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self._clock() + self.ttl, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_set(self, key, render, tags=()):
+        """Ambil nilai dari cache, atau panggil render() dan simpan hasilnya"""
+        value = self.get(key)
+        if value is None:
+            generations = self.generations(tags)
+            value = render()
+            self.set(key, value, tags, generations)
+        return value
+
+    def invalidate(self, *tags):
+        """Buang semua entri yang memiliki salah satu tag"""
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'stale_skips': self.stale_skips,
+            }
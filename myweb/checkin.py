@@ -0,0 +1,128 @@
+"""Check-in peserta di pintu masuk event.
+
+Setiap pendaftaran punya token tiket yang ditandatangani (itsdangerous), sehingga
+keaslian tiket bisa dicek tanpa query database. Keputusan check-in diambil dari
+database: setiap request menjalankan satu UPDATE bersyarat (status = 'registered')
+untuk semua tiket di batch, dan hanya baris yang benar-benar berubah yang dijawab
+'checked_in'. Karena itu scan ganda ditolak secara konsisten walaupun scanner
+tersebar di beberapa proses worker.
+
+Per proses disimpan set ID yang sudah check-in/dibatalkan sebagai jalur cepat:
+tiket yang sudah diketahui langsung dijawab tanpa query. State ini disimpan di
+FragmentCache (LRU + TTL), sehingga jumlah event di memori terbatas dan state
+event yang dihapus di worker lain (ID-nya bisa dipakai ulang SQLite) paling lama
+bertahan selama TTL. Kepemilikan event tidak disimpan; route mengeceknya per request.
+"""
+import threading
+
+from itsdangerous import BadSignature, URLSafeSerializer
+
+from cache import FragmentCache
+
+CHECKIN_OK = 'checked_in'
+CHECKIN_DUPLICATE = 'duplicate'
+CHECKIN_CANCELLED = 'cancelled'
+CHECKIN_INVALID = 'invalid'
+
+
+def ticket_serializer(secret_key):
+    return URLSafeSerializer(secret_key, salt='event-ticket')
+
+
+def make_ticket_token(serializer, registration_id, event_id):
+    return serializer.dumps([registration_id, event_id])
+
+
+def read_ticket_token(serializer, token):
+    """Kembalikan (registration_id, event_id) dari token, atau None jika tanda tangan tidak valid"""
+    try:
+        registration_id, event_id = serializer.loads(token)
+        return int(registration_id), int(event_id)
+    except (BadSignature, TypeError, ValueError):
+        return None
+
+
+class _EventState:
+    def __init__(self, registrations):
+        self.checked_in = set()
+        self.cancelled = set()
+        for registration_id, status in registrations:
+            self.add(registration_id, status)
+
+    def add(self, registration_id, status):
+        if status == 'attended':
+            self.checked_in.add(registration_id)
+        elif status == 'cancelled':
+            self.cancelled.add(registration_id)
+
+
+class CheckinService:
+    """Check-in per batch dengan state in-memory sebagai jalur cepat.
+
+    load_event(event_id) -> [(registration_id, status), ...] yang sudah 'attended' atau 'cancelled'
+    mark_attended(event_id, registration_ids) -> (set ID yang baru ditandai 'attended',
+        {registration_id: status} untuk ID lain yang terdaftar di event ini)
+    """
+
+    def __init__(self, load_event, mark_attended, max_events=256, ttl=300):
+        self._load_event = load_event
+        self._mark_attended = mark_attended
+        self._events = FragmentCache(max_events, ttl)
+        self._lock = threading.Lock()
+
+    def event_state(self, event_id):
+        """State event, dimuat dari database saat belum ada di cache atau sudah kedaluwarsa"""
+        return self._events.get_or_set(event_id, lambda: _EventState(self._load_event(event_id)),
+                                       tags=(f'event:{event_id}',))
+
+    def forget(self, event_id):
+        self._events.invalidate(f'event:{event_id}')
+
+    def scan(self, event_id, tickets):
+        """Check-in daftar tiket (registration_id, event_id) atau None untuk token tidak valid.
+
+        Mengembalikan list (registration_id, status) dengan urutan yang sama.
+        """
+        state = self.event_state(event_id)
+        known = {}
+        candidates = []
+        with self._lock:
+            for ticket in tickets:
+                if ticket is None or ticket[1] != event_id:
+                    continue
+                registration_id = ticket[0]
+                if registration_id in state.checked_in:
+                    known[registration_id] = CHECKIN_DUPLICATE
+                elif registration_id in state.cancelled:
+                    known[registration_id] = CHECKIN_CANCELLED
+                else:
+                    candidates.append(registration_id)
+        # Query dijalankan di luar lock agar scan event lain tidak menunggu round trip database
+        updated, others = set(), {}
+        if candidates:
+            updated, others = self._mark_attended(event_id, list(dict.fromkeys(candidates)))
+            with self._lock:
+                state.checked_in.update(updated)
+                for registration_id, status in others.items():
+                    state.add(registration_id, status)
+
+        results = []
+        answered = set()
+        for ticket in tickets:
+            if ticket is None or ticket[1] != event_id:
+                results.append((None, CHECKIN_INVALID))
+                continue
+            registration_id = ticket[0]
+            if registration_id in known:
+                status = known[registration_id]
+            elif registration_id in updated and registration_id not in answered:
+                status = CHECKIN_OK
+            elif registration_id in updated or others.get(registration_id) == 'attended':
+                status = CHECKIN_DUPLICATE
+            elif others.get(registration_id) == 'cancelled':
+                status = CHECKIN_CANCELLED
+            else:
+                status = CHECKIN_INVALID
+            answered.add(registration_id)
+            results.append((registration_id, status))
+        return results
@@ -1,8 +1,10 @@
-from app import app, db, User
+from app import create_app, db, User
+from migrations import upgrade
 from werkzeug.security import generate_password_hash
 
+app = create_app()
 with app.app_context():
-    db.create_all()
+    upgrade(db.engine)
     admin_user = User.query.filter_by(username='admin').first()
     if not admin_user:
         hashed_password = generate_password_hash('admin123')
@@ -0,0 +1,247 @@
+"""Migrasi schema database bernomor.
+
+Setiap migrasi dijalankan sekali dan dicatat di tabel schema_migrations.
+Jalankan dari folder myweb dengan:
+
+    flask migrate            # terapkan migrasi yang belum dijalankan
+    flask migrate --status   # lihat migrasi yang sudah/belum diterapkan
+
+Migrasi baru ditambahkan di akhir MIGRATIONS dengan nomor berikutnya; jangan
+mengubah migrasi yang sudah pernah dirilis. Migrasi tidak memanggil model atau
+helper dari app.py: schema dan SQL yang dipakai dibekukan di file ini, sehingga
+arti sebuah migrasi tidak ikut berubah ketika kode aplikasi berubah.
+"""
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, Text, select
+
+BACKFILL_BATCH_SIZE = 1000
+
+migration_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', migration_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+# Salinan beku schema awal aplikasi (sebelum migrasi ada). Jangan diubah mengikuti model:
+# perubahan schema selalu ditambahkan sebagai migrasi baru.
+baseline_metadata = MetaData()
+baseline_user = Table(
+    'user', baseline_metadata,
+    Column('id', Integer, primary_key=True),
+    Column('username', String(100), unique=True, nullable=False),
+    Column('password', String(200), nullable=False),
+    Column('is_admin', Boolean),
+)
+baseline_event = Table(
+    'event', baseline_metadata,
+    Column('id', Integer, primary_key=True),
+    Column('nama_event', String(100), nullable=False),
+    Column('deskripsi', Text, nullable=False),
+    Column('tanggal', DateTime, nullable=False),
+    Column('lokasi', String(100), nullable=False),
+    Column('gambar', String(200)),
+    Column('user_id', Integer, ForeignKey('user.id'), nullable=False),
+    Column('harga', Float, nullable=False),
+    Column('stok', Integer, nullable=False),
+)
+baseline_registration = Table(
+    'registration', baseline_metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('user.id'), nullable=False),
+    Column('event_id', Integer, ForeignKey('event.id'), nullable=False),
+    Column('status', String(20)),
+)
+
+# DDL index full-text dan trigger sinkronisasi seperti saat migrasi 0003 dibuat (beku, tidak
+# mengikuti EVENT_FTS_DDL di app.py)
+EVENT_FTS_DDL_V3 = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS event_fts USING fts5("
+    "nama_event, deskripsi, lokasi, content='event', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_ai AFTER INSERT ON event BEGIN "
+    "INSERT INTO event_fts(rowid, nama_event, deskripsi, lokasi) "
+    "VALUES (new.id, new.nama_event, new.deskripsi, new.lokasi); END",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_ad AFTER DELETE ON event BEGIN "
+    "INSERT INTO event_fts(event_fts, rowid, nama_event, deskripsi, lokasi) "
+    "VALUES ('delete', old.id, old.nama_event, old.deskripsi, old.lokasi); END",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_au AFTER UPDATE OF nama_event, deskripsi, lokasi ON event BEGIN "
+    "INSERT INTO event_fts(event_fts, rowid, nama_event, deskripsi, lokasi) "
+    "VALUES ('delete', old.id, old.nama_event, old.deskripsi, old.lokasi); "
+    "INSERT INTO event_fts(rowid, nama_event, deskripsi, lokasi) "
+    "VALUES (new.id, new.nama_event, new.deskripsi, new.lokasi); END",
+]
+
+# Tabel yang dibuat migrasi 0006, juga dibekukan
+registration_daily_v6 = Table(
+    'registration_daily', MetaData(),
+    Column('day', Date, primary_key=True),
+    Column('registrations', Integer, nullable=False),
+    Column('revenue', Float, nullable=False),
+)
+
+
+def _backfill(conn, table, column, value, batch_size=BACKFILL_BATCH_SIZE):
+    """Isi nilai NULL dengan UPDATE berbasis set per batch, commit setiap batch agar lock tidak ditahan lama"""
+    total = 0
+    while True:
+        batch = select(table.c.id).where(column.is_(None)).limit(batch_size)
+        updated = conn.execute(table.update().where(table.c.id.in_(batch)).values({column.name: value})).rowcount
+        conn.commit()
+        total += updated
+        if updated < batch_size:
+            return total
+
+
+def create_base_tables(conn):
+    # Database lama dari sebelum ada migrasi sudah punya tabel ini dan tidak disentuh
+    baseline_metadata.create_all(conn)
+
+
+def add_registration_constraints(conn):
+    conn.exec_driver_sql("ALTER TABLE registration ADD COLUMN idempotency_key VARCHAR(64)")
+    # Hapus pendaftaran ganda (sisakan yang paling awal) agar unique index bisa dibuat
+    conn.exec_driver_sql(
+        "DELETE FROM registration WHERE id NOT IN "
+        "(SELECT MIN(id) FROM registration GROUP BY user_id, event_id)"
+    )
+    # reserve_ticket mengurangi stok per pendaftaran, jadi stok berubah arti dari kapasitas menjadi
+    # sisa tiket; kurangi stok lama dengan jumlah pendaftaran yang sudah ada
+    conn.exec_driver_sql(
+        "UPDATE event SET stok = CASE WHEN stok > registered THEN stok - registered ELSE 0 END "
+        "FROM (SELECT event_id, COUNT(*) AS registered FROM registration GROUP BY event_id) AS counts "
+        "WHERE counts.event_id = event.id"
+    )
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_registration_user_event ON registration (user_id, event_id)"
+    )
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_registration_user_idempotency_key "
+        "ON registration (user_id, idempotency_key)"
+    )
+
+
+def add_event_search_index(conn):
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_event_tanggal_id ON event (tanggal, id)")
+    if conn.dialect.name != 'sqlite':
+        return
+    exists = conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'event_fts'").first()
+    for ddl in EVENT_FTS_DDL_V3:
+        conn.exec_driver_sql(ddl)
+    if not exists:
+        conn.exec_driver_sql("INSERT INTO event_fts(event_fts) VALUES ('rebuild')")
+
+
+def add_foreign_key_indexes(conn):
+    # Daftar peserta per event (event_detail, delete_event) diurutkan berdasarkan id pendaftaran.
+    # Lookup per user sudah tercakup oleh uq_registration_user_event (kolom pertama user_id).
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_registration_event_id ON registration (event_id, id)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_event_user_id ON event (user_id)")
+
+
+def backfill_event_defaults(conn):
+    event = baseline_event
+    user = baseline_user
+    admin_id = conn.execute(
+        select(user.c.id).where(user.c.is_admin.is_(True)).order_by(user.c.id).limit(1)
+    ).scalar() or 1
+    _backfill(conn, event, event.c.user_id, admin_id)
+    _backfill(conn, event, event.c.harga, 0.0)
+    _backfill(conn, event, event.c.stok, 0)
+
+
+def add_registration_counters(conn):
+    for name in ('registered_count', 'attended_count', 'cancelled_count'):
+        conn.exec_driver_sql(f"ALTER TABLE event ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0")
+    conn.exec_driver_sql("ALTER TABLE registration ADD COLUMN created_at DATETIME")
+    registration_daily_v6.create(conn)
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_event_sold ON event ((registered_count + attended_count) DESC)"
+    )
+    # Pendaftaran lama belum punya created_at, jadi rekap harian tetap kosong; hanya penghitung yang diisi
+    conn.exec_driver_sql(
+        "UPDATE event SET "
+        "registered_count = (SELECT COUNT(*) FROM registration "
+        "WHERE registration.event_id = event.id AND registration.status = 'registered'), "
+        "attended_count = (SELECT COUNT(*) FROM registration "
+        "WHERE registration.event_id = event.id AND registration.status = 'attended'), "
+        "cancelled_count = (SELECT COUNT(*) FROM registration "
+        "WHERE registration.event_id = event.id AND registration.status = 'cancelled')"
+    )
+
+
+def add_registration_price(conn):
+    conn.exec_driver_sql("ALTER TABLE registration ADD COLUMN harga FLOAT NOT NULL DEFAULT 0")
+    conn.exec_driver_sql("ALTER TABLE event ADD COLUMN revenue FLOAT NOT NULL DEFAULT 0")
+    # Harga saat pemesanan tidak tersimpan untuk pendaftaran lama; harga event saat ini yang paling dekat
+    conn.exec_driver_sql(
+        "UPDATE registration SET harga = COALESCE((SELECT harga FROM event WHERE event.id = registration.event_id), 0)"
+    )
+    conn.exec_driver_sql(
+        "UPDATE event SET revenue = COALESCE((SELECT SUM(harga) FROM registration "
+        "WHERE registration.event_id = event.id), 0)"
+    )
+    # Rekap harian disusun ulang dari harga per pendaftaran agar cocok dengan hitung ulang
+    conn.exec_driver_sql("DELETE FROM registration_daily")
+    conn.exec_driver_sql(
+        "INSERT INTO registration_daily (day, registrations, revenue) "
+        "SELECT date(created_at), COUNT(*), COALESCE(SUM(harga), 0) FROM registration "
+        "WHERE created_at IS NOT NULL GROUP BY date(created_at)"
+    )
+
+
+def shard_registration_daily(conn):
+    # SQLite tidak bisa mengubah primary key, jadi tabel dibuat ulang dengan kunci (day, event_id)
+    conn.exec_driver_sql(
+        "CREATE TABLE registration_daily_new ("
+        "day DATE NOT NULL, "
+        "event_id INTEGER NOT NULL, "
+        "registrations INTEGER NOT NULL, "
+        "revenue FLOAT NOT NULL, "
+        "PRIMARY KEY (day, event_id), "
+        "FOREIGN KEY(event_id) REFERENCES event (id))"
+    )
+    conn.exec_driver_sql(
+        "INSERT INTO registration_daily_new (day, event_id, registrations, revenue) "
+        "SELECT date(created_at), event_id, COUNT(*), COALESCE(SUM(harga), 0) FROM registration "
+        "WHERE created_at IS NOT NULL GROUP BY date(created_at), event_id"
+    )
+    conn.exec_driver_sql("DROP TABLE registration_daily")
+    conn.exec_driver_sql("ALTER TABLE registration_daily_new RENAME TO registration_daily")
+
+
+MIGRATIONS = [
+    (1, 'create_base_tables', create_base_tables),
+    (2, 'add_registration_constraints', add_registration_constraints),
+    (3, 'add_event_search_index', add_event_search_index),
+    (4, 'add_foreign_key_indexes', add_foreign_key_indexes),
+    (5, 'backfill_event_defaults', backfill_event_defaults),
+    (6, 'add_registration_counters', add_registration_counters),
+    (7, 'add_registration_price', add_registration_price),
+    (8, 'shard_registration_daily', shard_registration_daily),
+]
+
+
+def applied_versions(engine):
+    with engine.connect() as conn:
+        migration_metadata.create_all(conn)
+        conn.commit()
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(engine):
+    applied = applied_versions(engine)
+    return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+
+def upgrade(engine, log=print):
+    """Terapkan semua migrasi yang belum dijalankan, masing-masing dalam koneksi dan commit sendiri"""
+    pending = pending_migrations(engine)
+    for version, name, migrate in pending:
+        log(f'Menerapkan migrasi {version:04d} {name}')
+        with engine.connect() as conn:
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(version=version, name=name, applied_at=datetime.now()))
+            conn.commit()
+    return pending
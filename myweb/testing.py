@@ -0,0 +1,29 @@
+"""Helper untuk pengujian: pastikan route tidak melebihi query budget yang dideklarasikan dengan @query_budget.
+
+Contoh:
+
+    from app import create_app
+    from testing import assert_query_budget
+
+    app = create_app({'TESTING': True})
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+    assert_query_budget(client, '/events/1')
+
+Semua route dengan @query_budget dicek di tests/test_query_budget.py (python -m pytest tests).
+"""
+
+
+def assert_query_budget(client, path, method='GET', **kwargs):
+    """Kirim request lewat test client dan gagal (AssertionError) jika jumlah query melebihi budget route"""
+    response = client.open(path, method=method, **kwargs)
+    if 'X-Query-Count' not in response.headers:
+        raise AssertionError('Header X-Query-Count tidak ada; aktifkan app.testing atau SQL_DEBUG_HEADERS')
+    if 'X-Query-Budget' not in response.headers:
+        raise AssertionError(f'{method} {path} tidak mendeklarasikan @query_budget')
+    count = int(response.headers['X-Query-Count'])
+    budget = int(response.headers['X-Query-Budget'])
+    if count > budget:
+        raise AssertionError(f'{method} {path} menjalankan {count} query, melebihi budget {budget}')
+    return response
@@ -0,0 +1,41 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db, User, Event, reserve_ticket  # noqa: E402
+import migrations  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}'})
+    with app.app_context():
+        migrations.upgrade(db.engine, log=lambda message: None)
+        db.session.add_all([
+            User(username='admin', password='x', is_admin=True),
+            User(username='peserta', password='x'),
+        ])
+        start = datetime(2030, 1, 1)
+        db.session.add_all([
+            Event(nama_event=f'Konser {i}', deskripsi='Konser musik', tanggal=start + timedelta(days=i),
+                  lokasi='Jakarta', user_id=1, harga=50000.0, stok=10)
+            for i in range(30)
+        ])
+        db.session.commit()
+        for event_id in (1, 2, 3):
+            reserve_ticket(1, event_id)
+            reserve_ticket(2, event_id)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def login_client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+    return client
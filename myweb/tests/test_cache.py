@@ -0,0 +1,27 @@
+from cache import FragmentCache
+
+
+def test_render_during_invalidation_is_not_stored():
+    cache = FragmentCache()
+
+    def render():
+        # Route lain mengubah data dan meng-invalidate selagi fragmen ini dirender dari data lama
+        cache.invalidate('events')
+        return 'lama'
+
+    assert cache.get_or_set('beranda', render, tags=('events',)) == 'lama'
+    assert cache.get('beranda') is None
+    assert cache.get_or_set('beranda', lambda: 'baru', tags=('events',)) == 'baru'
+    assert cache.get('beranda') == 'baru'
+    assert cache.stats()['stale_skips'] == 1
+
+
+def test_invalidation_of_other_tag_keeps_entry():
+    cache = FragmentCache()
+
+    def render():
+        cache.invalidate('event:2')
+        return 'detail'
+
+    cache.get_or_set('event:1', render, tags=('event:1',))
+    assert cache.get('event:1') == 'detail'
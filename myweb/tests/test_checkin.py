@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from checkin import CHECKIN_DUPLICATE, CHECKIN_OK, CheckinService
+from app import db, Event, checkin_service
+from conftest import login_client
+
+
+def test_event_state_is_bounded_and_reloaded():
+    loads = []
+
+    def load_event(event_id):
+        loads.append(event_id)
+        return [(event_id * 10, 'attended')]
+
+    service = CheckinService(load_event, lambda event_id, ids: (set(ids), {}), max_events=1)
+    assert service.scan(1, [(10, 1), (11, 1)]) == [(10, CHECKIN_DUPLICATE), (11, CHECKIN_OK)]
+    service.scan(2, [(20, 2)])
+    service.scan(1, [(10, 1)])
+    assert loads == [1, 2, 1]
+    service.forget(1)
+    service.scan(1, [(10, 1)])
+    assert loads == [1, 2, 1, 1]
+
+
+def test_checkin_owner_is_read_from_database(app):
+    with app.app_context():
+        checkin_service().event_state(10)
+        # Event dihapus lalu ID-nya dipakai event milik user lain, tanpa lewat route (worker lain)
+        db.session.delete(db.session.get(Event, 10))
+        db.session.add(Event(id=10, nama_event='Baru', deskripsi='x', tanggal=datetime(2030, 6, 1),
+                             lokasi='Bandung', user_id=2, harga=0.0, stok=5))
+        db.session.commit()
+    response = login_client(app, 2).post('/api/events/10/checkin', json={'tokens': ['x']})
+    assert response.status_code == 200
+    assert response.get_json()['results'] == [{'registration_id': None, 'status': 'invalid'}]
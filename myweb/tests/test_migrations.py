@@ -0,0 +1,45 @@
+import os
+import shutil
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from app import db
+import migrations
+
+BASELINE_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'event_registration.db')
+
+
+def migrated_schema(url):
+    engine = create_engine(url)
+    try:
+        migrations.upgrade(engine, log=lambda message: None)
+        inspector = inspect(engine)
+        with engine.connect() as conn:
+            # Dibaca dari sqlite_master karena inspector melewati index berbasis ekspresi (ix_event_sold)
+            indexes = conn.exec_driver_sql("SELECT tbl_name, name FROM sqlite_master WHERE type = 'index'").all()
+        return {
+            table: ({column['name'] for column in inspector.get_columns(table)},
+                    {name for tbl_name, name in indexes if tbl_name == table})
+            for table in db.metadata.tables
+        }
+    finally:
+        engine.dispose()
+
+
+def model_schema():
+    return {
+        name: ({column.name for column in table.columns}, {index.name for index in table.indexes})
+        for name, table in db.metadata.tables.items()
+    }
+
+
+@pytest.mark.parametrize('source', ['empty', 'baseline'])
+def test_migrations_produce_model_schema(tmp_path, source):
+    path = tmp_path / 'migrate.db'
+    if source == 'baseline':
+        shutil.copy(BASELINE_DB, path)
+    schema = migrated_schema(f'sqlite:///{path}')
+    for table, (columns, indexes) in model_schema().items():
+        assert schema[table][0] == columns, table
+        assert indexes <= schema[table][1], table
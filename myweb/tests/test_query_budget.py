@@ -0,0 +1,47 @@
+import pytest
+
+from conftest import login_client
+from testing import assert_query_budget
+
+USER_PATHS = [
+    '/',
+    '/?q=konser&waktu=upcoming',
+    '/events',
+    '/events?after=2030-01-20T00:00:00_20',
+    '/events/1',
+    '/events/1?after=1',
+    '/events/30',
+    '/profil',
+]
+ADMIN_PATHS = [
+    '/admin/users',
+    '/admin/events',
+    '/admin/events?harga_min=1000',
+    '/admin/dashboard',
+]
+
+
+@pytest.mark.parametrize('path', USER_PATHS)
+def test_user_routes_within_budget(app, path):
+    client = login_client(app, 2)
+    # Request pertama mengisi fragment cache, request kedua memakai cache
+    assert_query_budget(client, path)
+    assert_query_budget(client, path)
+
+
+@pytest.mark.parametrize('path', USER_PATHS + ADMIN_PATHS)
+def test_admin_routes_within_budget(app, path):
+    client = login_client(app, 1)
+    assert_query_budget(client, path)
+    assert_query_budget(client, path)
+
+
+def test_budget_exceeded_is_reported(app):
+    view = app.view_functions['main.events']
+    budget = view.query_budget
+    view.query_budget = 0
+    try:
+        with pytest.raises(AssertionError, match='melebihi budget'):
+            assert_query_budget(login_client(app, 2), '/events')
+    finally:
+        view.query_budget = budget
@@ -0,0 +1,35 @@
+import io
+import os
+
+from PIL import Image, ImageFile
+from werkzeug.datastructures import FileStorage
+
+from uploads import save_upload, variant_name
+
+MAX_PIXELS = 40 * 1000 * 1000
+
+
+def png_upload(size, mode='1'):
+    buffer = io.BytesIO()
+    Image.new(mode, size).save(buffer, 'PNG')
+    return FileStorage(stream=io.BytesIO(buffer.getvalue()), filename='gambar.png')
+
+
+def test_oversized_image_is_rejected_before_decode(tmp_path, monkeypatch):
+    # 10000x10000 piksel satu warna hanya belasan KB setelah dikompres, tapi 100 MP saat di-decode
+    upload = png_upload((10000, 10000))
+    assert len(upload.stream.getvalue()) < 100 * 1024
+
+    def fail_load(self):
+        raise AssertionError('piksel di-decode')
+
+    monkeypatch.setattr(ImageFile.ImageFile, 'load', fail_load)
+    assert save_upload(upload, str(tmp_path), MAX_PIXELS) is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_image_within_limit_is_saved_with_variants(tmp_path):
+    filename = save_upload(png_upload((800, 600), 'RGB'), str(tmp_path), MAX_PIXELS)
+    assert filename.endswith('.png')
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [filename, variant_name(filename, 'thumb'), variant_name(filename, 'card')])
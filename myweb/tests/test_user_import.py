@@ -0,0 +1,18 @@
+import pytest
+
+from app import db, User
+
+
+@pytest.mark.parametrize('filename, content, line', [
+    ('users.csv', 'username,password\nbudi,rahasia\nsiti\n', 3),
+    ('users.jsonl', '{"username": "budi", "password": "rahasia"}\n{"username": 42, "password": "x"}\n', 2),
+    ('users.jsonl', '{"username": "budi", "password": "rahasia"}\n\n{"username": "siti",\n', 3),
+])
+def test_invalid_row_is_usage_error_before_import(app, tmp_path, filename, content, line):
+    path = tmp_path / filename
+    path.write_text(content, encoding='utf-8')
+    result = app.test_cli_runner().invoke(args=['import-users', str(path), '--workers', '1'])
+    assert result.exit_code == 2
+    assert f'baris {line} ' in result.output
+    with app.app_context():
+        assert db.session.query(User).filter_by(username='budi').first() is None
@@ -0,0 +1,144 @@
+"""Pipeline upload gambar event.
+
+File upload ditulis bertahap ke file sementara sambil dihitung hash SHA-256-nya,
+lalu disimpan dengan nama berdasarkan hash isi (file yang sama hanya disimpan
+sekali dan tidak pernah saling menimpa). Varian thumbnail dan card dibuat sekali
+saat upload sehingga halaman daftar tidak perlu memuat gambar asli.
+"""
+import hashlib
+import os
+import tempfile
+
+from PIL import Image, ImageOps
+
+CHUNK_SIZE = 64 * 1024
+
+# Nama varian -> ukuran (lebar, tinggi); gambar di-crop agar pas seperti object-fit: cover
+VARIANTS = {
+    'thumb': (160, 160),
+    'card': (640, 400),
+}
+
+# Format yang dideteksi Pillow -> ekstensi file asli yang disimpan
+FORMAT_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif'}
+
+
+class ImageTooLarge(Image.DecompressionBombError):
+    """Jumlah piksel gambar melebihi batas max_pixels aplikasi"""
+
+
+# Error decode Pillow: file rusak/terpotong (OSError, SyntaxError) atau terlalu besar (decompression
+# bomb, termasuk ImageTooLarge)
+IMAGE_ERRORS = (OSError, SyntaxError, Image.DecompressionBombError)
+
+
+def variant_name(filename, variant):
+    stem = filename.rsplit('.', 1)[0]
+    return f'{stem}_{variant}.jpg'
+
+
+def _stream_to_tempfile(stream, folder):
+    """Salin stream upload per chunk ke file sementara di folder tujuan; kembalikan (path, sha256)"""
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.upload')
+    with os.fdopen(fd, 'wb') as tmp:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            tmp.write(chunk)
+    return tmp_path, digest.hexdigest()
+
+
+def _check_pixels(img, max_pixels):
+    # img.size dibaca dari header; dipanggil sebelum piksel apa pun di-decode
+    width, height = img.size
+    if width * height > max_pixels:
+        raise ImageTooLarge(f'{width}x{height} piksel melebihi batas {max_pixels}')
+
+
+def _detect_format(path, max_pixels):
+    try:
+        with Image.open(path) as img:
+            _check_pixels(img, max_pixels)
+            img.verify()
+            return img.format
+    except IMAGE_ERRORS:
+        return None
+
+
+def remove_variants(folder, filename):
+    for variant in VARIANTS:
+        target = os.path.join(folder, variant_name(filename, variant))
+        if os.path.exists(target):
+            os.remove(target)
+
+
+def generate_variants(folder, filename, max_pixels):
+    """Buat varian thumb dan card (JPEG) untuk file di folder; varian yang sudah ada dilewati.
+
+    verify() tidak men-decode piksel, jadi file terpotong baru ketahuan di sini: error
+    IMAGE_ERRORS diteruskan ke pemanggil setelah varian yang sempat dibuat dihapus.
+    Gambar lebih dari max_pixels piksel ditolak dengan ImageTooLarge sebelum di-decode.
+    """
+    try:
+        for variant, size in VARIANTS.items():
+            _generate_variant(folder, filename, variant, size, max_pixels)
+    except IMAGE_ERRORS:
+        remove_variants(folder, filename)
+        raise
+
+
+def _generate_variant(folder, filename, variant, size, max_pixels):
+    source = os.path.join(folder, filename)
+    target = os.path.join(folder, variant_name(filename, variant))
+    if os.path.exists(target):
+        return
+    with Image.open(source) as img:
+        _check_pixels(img, max_pixels)
+        # draft() membuat decoder JPEG langsung mengecilkan gambar besar saat decode
+        img.draft('RGB', (size[0] * 2, size[1] * 2))
+        img = ImageOps.exif_transpose(img)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGBA')
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        else:
+            img = img.convert('RGB')
+        resized = ImageOps.fit(img, size, Image.LANCZOS)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.variant')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                resized.save(tmp, 'JPEG', quality=82, optimize=True, progressive=True)
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def save_upload(file_storage, folder, max_pixels):
+    """Simpan upload dengan nama berdasarkan hash isi dan buat variannya.
+
+    Mengembalikan nama file yang disimpan, atau None jika file bukan gambar yang didukung,
+    lebih dari max_pixels piksel, atau gagal di-decode (file asli dan variannya tidak disimpan).
+    """
+    tmp_path, digest = _stream_to_tempfile(file_storage.stream, folder)
+    image_format = _detect_format(tmp_path, max_pixels)
+    if image_format not in FORMAT_EXTENSIONS:
+        os.remove(tmp_path)
+        return None
+    filename = f'{digest}.{FORMAT_EXTENSIONS[image_format]}'
+    target = os.path.join(folder, filename)
+    if os.path.exists(target):
+        # Isi yang sama sudah pernah diupload
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, target)
+    try:
+        generate_variants(folder, filename, max_pixels)
+    except IMAGE_ERRORS:
+        os.remove(target)
+        return None
+    return filename
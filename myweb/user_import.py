@@ -0,0 +1,117 @@
+"""Import user massal dari CSV atau JSON lines (dipakai oleh `flask import-users`).
+
+Input dibaca secara streaming per batch sehingga memori tetap terbatas berapa pun
+ukuran file. Password di-hash paralel di process pool (generate_password_hash
+sengaja lambat dan memakai CPU), username yang sudah ada dicek lewat satu set
+di memori, dan setiap batch disimpan dengan satu bulk INSERT.
+
+Format CSV: header username,password[,is_admin]
+Format JSON lines: {"username": "...", "password": "...", "is_admin": false}
+"""
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+
+import click
+from werkzeug.security import generate_password_hash
+
+from app import db, User, discard_recorded_queries
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'ya'}
+REQUIRED_FIELDS = ('username', 'password')
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in TRUE_VALUES
+
+
+def _json_rows(path, f):
+    for number, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except json.JSONDecodeError as error:
+            raise click.UsageError(f'{path}: baris {number} bukan JSON yang valid ({error.msg})')
+
+
+def _csv_rows(path, f):
+    rows = csv.DictReader(f)
+    missing = [field for field in REQUIRED_FIELDS if field not in (rows.fieldnames or ())]
+    if missing:
+        raise click.UsageError(f'{path}: header CSV tidak memiliki kolom {", ".join(missing)}')
+    for row in rows:
+        yield rows.line_num, row
+
+
+def read_users(path, fmt=None):
+    """Generator (username, password, is_admin) dari file CSV atau JSON lines.
+
+    Baris yang tidak valid dilaporkan sebagai click.UsageError dengan nomor barisnya:
+    kolom wajib tidak ada di header CSV, JSON rusak, atau username/password bukan
+    string yang tidak kosong (misalnya baris CSV yang kolomnya kurang).
+    """
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.json', '.ndjson')) else 'csv')
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = _csv_rows(path, f) if fmt == 'csv' else _json_rows(path, f)
+        for number, row in rows:
+            if not isinstance(row, dict):
+                raise click.UsageError(f'{path}: baris {number} bukan objek JSON')
+            invalid = [field for field in REQUIRED_FIELDS
+                       if not isinstance(row.get(field), str) or not row[field].strip()]
+            if invalid:
+                raise click.UsageError(f'{path}: baris {number} tidak memiliki {", ".join(invalid)} yang valid')
+            yield row['username'].strip(), row['password'], _parse_bool(row.get('is_admin'))
+
+
+def count_users(path, fmt=None):
+    """Validasi seluruh file tanpa menulis apa pun; mengembalikan jumlah baris user"""
+    return sum(1 for _ in read_users(path, fmt))
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_users(rows, batch_size=1000, workers=None, hash_method=None, progress=print):
+    """Import user dari iterable (username, password, is_admin).
+
+    Mengembalikan (jumlah diimport, daftar username yang konflik).
+    """
+    workers = workers or os.cpu_count() or 1
+    hasher = partial(generate_password_hash, method=hash_method) if hash_method else generate_password_hash
+    # Satu query untuk semua username; username dari file ikut ditambahkan agar duplikat di file juga terdeteksi
+    taken = set(db.session.execute(db.select(User.username)).scalars())
+    imported = 0
+    conflicts = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch in _batches(rows, batch_size):
+            fresh = []
+            for username, password, is_admin in batch:
+                if username in taken:
+                    conflicts.append(username)
+                    continue
+                taken.add(username)
+                fresh.append((username, password, is_admin))
+            if fresh:
+                chunksize = max(1, len(fresh) // (workers * 4))
+                hashes = pool.map(hasher, [password for _, password, _ in fresh], chunksize=chunksize)
+                db.session.execute(db.insert(User), [
+                    {'username': username, 'password': hashed, 'is_admin': is_admin}
+                    for (username, _, is_admin), hashed in zip(fresh, hashes)
+                ])
+                db.session.commit()
+                discard_recorded_queries()
+                imported += len(fresh)
+            progress(f'{imported} user diimport, {len(conflicts)} konflik')
+    return imported, conflicts